@@ -8,8 +8,14 @@ from loguru import logger
 
 from src.services.auth_service import AuthService
 from src.interfaces.router import BaseRouter
+from src.clients.llm_client import LLMClient
+from src.common.database.migrations import MigrationRunner
 from src.common.database.postgres import Postgres
+from src.common.database.schema import MIGRATIONS
+from src.models.config import AppConfig
+from src.common.password_hasher import PasswordHasher
 from src.common.container import setup_app_container
+from src.services.report_service import ReportService
 from src.common.security import session_token_header
 
 
@@ -39,11 +45,21 @@ class Application:
         @asynccontextmanager
         async def lifespan(server: FastAPI) -> AsyncGenerator[None, None]:
             db = self.container.get(Postgres)
+            password_hasher = self.container.get(PasswordHasher)
+            llm_client = self.container.get(LLMClient)
+            report_service = self.container.get(ReportService)
+            config = self.container.get(AppConfig)
             try:
                 await db.connect()
+                if config.db_config.DB_RUN_MIGRATIONS:
+                    await MigrationRunner(db, MIGRATIONS).run()
+                await report_service.start()
                 yield
             finally:
                 logger.warning("Ending ")
+                await report_service.stop()
+                password_hasher.close()
+                await llm_client.close()
                 await db.disconnect()
 
         server = FastAPI(
@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from loguru import logger
+
+from src.models.config import LLMConfig
+
+
+class SQLiteCacheTier:
+    """Дисковый уровень кеша: переживает рестарты и делится между воркерами."""
+
+    def __init__(self, path: str, max_rows: int):
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_accessed_at ON llm_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> tuple[str, float] | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                self._conn.commit()
+        return row
+
+    def set(self, key: str, value: str, expires_at: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now),
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_rows,),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LLMResponseCache:
+    """
+    Кеш ответов модели по хешу (model, messages, параметры).
+    Первый уровень - LRU в памяти, ограниченный числом записей и байтами,
+    второй (необязательный) - SQLite.
+    """
+
+    def __init__(
+        self,
+        ttls: dict[str, float],
+        max_entries: int,
+        max_bytes: int,
+        sqlite_tier: SQLiteCacheTier | None = None,
+    ):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = 0
+        self._items: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._sqlite = sqlite_tier
+
+    @classmethod
+    def create(cls, config: LLMConfig) -> "LLMResponseCache":
+        sqlite_tier = None
+        if config.LLM_CACHE_SQLITE_PATH:
+            sqlite_tier = SQLiteCacheTier(
+                path=config.LLM_CACHE_SQLITE_PATH,
+                max_rows=config.LLM_CACHE_SQLITE_MAX_ROWS,
+            )
+            logger.info(f"LLM cache SQLite tier: {config.LLM_CACHE_SQLITE_PATH}")
+
+        return cls(
+            ttls={
+                "classification": config.LLM_CACHE_TTL_CLASSIFICATION,
+                "one_time_help": config.LLM_CACHE_TTL_ONE_TIME_HELP,
+                "report": config.LLM_CACHE_TTL_REPORT,
+                "cookie": config.LLM_CACHE_TTL_COOKIE,
+            },
+            max_entries=config.LLM_CACHE_MAX_ENTRIES,
+            max_bytes=config.LLM_CACHE_MAX_BYTES,
+            sqlite_tier=sqlite_tier,
+        )
+
+    @staticmethod
+    def make_key(model: str, messages: list[dict[str, str]], **params: Any) -> str:
+        raw = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def ttl(self, call_type: str | None) -> float:
+        return self.ttls.get(call_type, 0) if call_type else 0
+
+    async def get(self, key: str) -> str | None:
+        item = self._items.get(key)
+        if item is not None:
+            expires_at, value = item
+            if expires_at > time.time():
+                self._items.move_to_end(key)
+                self.hits += 1
+                return value
+            self._drop(key)
+
+        if self._sqlite is not None:
+            row = await asyncio.to_thread(self._sqlite.get, key)
+            if row is not None:
+                value, expires_at = row
+                self._remember(key, value, expires_at)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        expires_at = time.time() + ttl
+        self._remember(key, value, expires_at)
+        if self._sqlite is not None:
+            await asyncio.to_thread(self._sqlite.set, key, value, expires_at)
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        size = len(value.encode())
+        if size > self.max_bytes or not self.max_entries:
+            return
+
+        self._drop(key)
+        self._items[key] = (expires_at, value)
+        self._size += size
+        while len(self._items) > self.max_entries or self._size > self.max_bytes:
+            oldest = next(iter(self._items))
+            self._drop(oldest)
+
+    def _drop(self, key: str) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._size -= len(item[1].encode())
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._items),
+            "bytes": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self) -> None:
+        if self._sqlite is not None:
+            self._sqlite.close()
@@ -1,29 +1,143 @@
-from typing import Self
-from openai import OpenAI
+import asyncio
+from typing import Any, AsyncIterator, Callable, Self, cast
+from openai import AsyncOpenAI, APITimeoutError
+from openai.types.chat import ChatCompletionMessageParam
 from loguru import logger
 
-from src.models.config import AppConfig
+from src.clients.llm_cache import LLMResponseCache
+from src.common.errors import GatewayTimeoutError
+from src.models.config import LLMConfig
 from src.interfaces.client import IBaseClient
 
 
 class LLMClient(IBaseClient):
     _instance = None
 
-    def __init__(self, client: OpenAI, model_name: str) -> None:
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        model_name: str,
+        max_concurrency: int = 8,
+        timeout: float = 120.0,
+        cache: LLMResponseCache | None = None,
+    ) -> None:
         self.model_name = model_name
         self.client = client
+        self.timeout = timeout
+        self.cache = cache
+        self._semaphore = asyncio.Semaphore(max_concurrency)
 
     @classmethod
-    def create(cls, config: AppConfig) -> Self:
+    def create(cls, config: LLMConfig) -> Self:
         if cls._instance is None:
             cls._instance = cls._create_client(config=config)
         return cls._instance
 
     @classmethod
-    def _create_client(cls, config: AppConfig) -> Self:
-        client = OpenAI(api_key=config.LLM_API_KEY, base_url=config.LLM_BASE_URL)
+    def _create_client(cls, config: LLMConfig) -> Self:
+        client = AsyncOpenAI(api_key=config.LLM_API_KEY, base_url=config.LLM_BASE_URL)
         model_name = config.LLM_MODEL_NAME
 
         logger.success("LLM-client succes initialized")
 
-        return cls(client=client, model_name=model_name)
+        return cls(
+            client=client,
+            model_name=model_name,
+            max_concurrency=config.LLM_MAX_CONCURRENCY,
+            timeout=config.LLM_TIMEOUT,
+            cache=LLMResponseCache.create(config),
+        )
+
+    async def complete(
+        self,
+        messages: list[dict[str, str]],
+        model: str | None = None,
+        timeout: float | None = None,
+        call_type: str | None = None,
+        validate: Callable[[str], Any] | None = None,
+    ) -> str:
+        """
+        Один запрос к модели; одновременно выполняется не больше LLM_MAX_CONCURRENCY.
+        Для call_type с ненулевым TTL ответ берётся из кеша, если такой запрос уже был.
+        validate разбирает ответ до записи в кеш: если он бросает исключение,
+        ответ не кешируется и повторный запрос снова пойдёт к модели.
+        """
+        content, _ = await self.complete_with_usage(
+            messages=messages,
+            model=model,
+            timeout=timeout,
+            call_type=call_type,
+            validate=validate,
+        )
+        return content
+
+    async def complete_with_usage(
+        self,
+        messages: list[dict[str, str]],
+        model: str | None = None,
+        timeout: float | None = None,
+        call_type: str | None = None,
+        validate: Callable[[str], Any] | None = None,
+    ) -> tuple[str, int]:
+        """То же, что complete, плюс число сгенерированных токенов (0 для ответа из кеша)."""
+        model = model or self.model_name
+        cache = self.cache
+        ttl = cache.ttl(call_type) if cache else 0
+        key = cache.make_key(model, messages) if cache and ttl else None
+        if cache and key:
+            cached = await cache.get(key)
+            if cached is not None:
+                return cached, 0
+
+        async with self._semaphore:
+            try:
+                completion = await self.client.chat.completions.create(
+                    model=model,
+                    messages=cast(list[ChatCompletionMessageParam], messages),
+                    timeout=timeout or self.timeout,
+                )
+            except APITimeoutError as e:
+                logger.error(f"LLM request timed out: {e}")
+                raise GatewayTimeoutError(detail="LLM request timed out")
+
+        content = completion.choices[0].message.content or ""
+        if cache and key and content:
+            if validate is not None:
+                validate(content)
+            await cache.set(key, content, ttl)
+        tokens = completion.usage.completion_tokens if completion.usage else 0
+        return content, tokens
+
+    async def stream(
+        self,
+        messages: list[dict[str, str]],
+        model: str | None = None,
+        timeout: float | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Потоковый запрос к модели: отдаёт текст по мере генерации.
+        Если потребитель прервал итерацию (клиент отключился), запрос к провайдеру закрывается.
+        """
+        async with self._semaphore:
+            try:
+                stream = await self.client.chat.completions.create(
+                    model=model or self.model_name,
+                    messages=cast(list[ChatCompletionMessageParam], messages),
+                    timeout=timeout or self.timeout,
+                    stream=True,
+                )
+            except APITimeoutError as e:
+                logger.error(f"LLM request timed out: {e}")
+                raise GatewayTimeoutError(detail="LLM request timed out")
+
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.close()
+
+    async def close(self) -> None:
+        await self.client.close()
+        if self.cache:
+            self.cache.close()
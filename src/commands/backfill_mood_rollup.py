@@ -0,0 +1,29 @@
+"""
+Пересборка дневной сводки настроений "MoodDailyRollup".
+Таблицу создаёт миграция 2 (python -m src.commands.migrate).
+
+Запуск: python -m src.commands.backfill_mood_rollup
+"""
+
+import asyncio
+
+from loguru import logger
+
+from src.common.database.postgres import Postgres
+from src.models.config import AppConfig
+from src.repositories.calendar_repository import CalendarRepository
+
+
+async def backfill_mood_rollup() -> None:
+    config = AppConfig.create()
+    db = Postgres.from_config(config.db_config)
+    await db.connect()
+    try:
+        status = await CalendarRepository(conn=db).rebuild_mood_rollup()
+        logger.success(f"Mood rollup rebuilt: {status}")
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_mood_rollup())
@@ -0,0 +1,32 @@
+"""
+Применение миграций схемы БД.
+
+Запуск: python -m src.commands.migrate
+"""
+
+import asyncio
+
+from loguru import logger
+
+from src.common.database.migrations import MigrationRunner
+from src.common.database.postgres import Postgres
+from src.common.database.schema import MIGRATIONS
+from src.models.config import AppConfig
+
+
+async def migrate() -> None:
+    config = AppConfig.create()
+    db = Postgres.from_config(config.db_config)
+    await db.connect()
+    try:
+        applied = await MigrationRunner(db, MIGRATIONS).run()
+        if not applied:
+            logger.info("Schema is up to date")
+        for migration in applied:
+            logger.success(f"Applied migration {migration.version}: {migration.name}")
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
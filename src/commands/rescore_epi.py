@@ -0,0 +1,51 @@
+"""
+Пересчёт результатов теста EPI по сохранённым ответам, например после
+изменения ключей или порогов в src.common.epi.
+
+Запуск: python -m src.commands.rescore_epi
+"""
+
+import asyncio
+
+from loguru import logger
+
+from src.common import epi
+from src.common.database.postgres import Postgres
+from src.models.config import AppConfig
+from src.repositories.user_repository import UserRepository
+
+BATCH_SIZE = 5000
+
+
+async def _flush(repo: UserRepository, batch: list) -> None:
+    scores = epi.score_batch(row["responses"] for row in batch)
+    await repo.update_onboarding_results(
+        ids=[row["id"] for row in batch],
+        results=[str(score["interpretation"]) for score in scores],
+        personality_types=[str(score["personality_type"]) for score in scores],
+    )
+
+
+async def rescore_epi() -> None:
+    config = AppConfig.create()
+    db = Postgres.from_config(config.db_config)
+    await db.connect()
+    try:
+        repo = UserRepository(conn=db)
+        batch, total = [], 0
+        async for row in repo.iter_onboarding_responses():
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                await _flush(repo, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            await _flush(repo, batch)
+            total += len(batch)
+        logger.success(f"Rescored {total} onboarding tests")
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(rescore_epi())
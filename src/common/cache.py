@@ -0,0 +1,72 @@
+import hashlib
+import time
+from typing import Any
+
+from asyncpg import Record
+from pydantic_core import to_json
+
+
+def json_fallback(value: Any) -> Any:
+    # Записи asyncpg сериализуются без промежуточного списка словарей
+    if isinstance(value, Record):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dump_json(content: Any) -> bytes:
+    """
+    Компактный JSON в UTF-8 сериализатором pydantic-core (Rust): UUID, date
+    и datetime кодируются напрямую, минуя jsonable_encoder. NaN и Infinity
+    записываются как null, чтобы ответ оставался корректным JSON.
+    """
+    return to_json(content, fallback=json_fallback, inf_nan_mode="null")
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate in ("*", etag):
+            return True
+    return False
+
+
+class CachedPayload:
+    """Заранее сериализованный JSON-ответ вместе с его ETag."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    @classmethod
+    def from_content(cls, content: Any) -> "CachedPayload":
+        return cls(dump_json(content))
+
+
+class TTLCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._items: dict[Any, tuple[float, Any]] = {}
+
+    def get(self, key: Any) -> Any | None:
+        item = self._items.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            self._items.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: Any, value: Any) -> None:
+        self._items[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key: Any | None = None) -> None:
+        if key is None:
+            self._items.clear()
+        else:
+            self._items.pop(key, None)
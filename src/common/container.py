@@ -13,12 +13,21 @@ from src.routers.calendar_router import CalendarRouter
 from src.services.example import ExampleService
 from src.models.config import AppConfig
 from src.common.database.postgres import Postgres
+from src.common.password_hasher import PasswordHasher
+from src.common.session_store import (
+    CachedSessionStore,
+    LocalSessionStore,
+    PostgresSessionStore,
+)
+from src.interfaces.session_store import BaseSessionStore
 from src.repositories.user_repository import UserRepository
 from src.repositories.calendar_repository import CalendarRepository
 from src.repositories.todo_calendar_repository import TodoCalendarRepository
+from src.repositories.report_job_repository import ReportJobRepository
 from src.services.auth_service import AuthService
 from src.services.llm_service import LLMService
 from src.services.calendar_service import CalendarService
+from src.services.report_service import ReportService
 
 
 class ConfigProvider(Provider):
@@ -40,7 +49,7 @@ class ClientProvider(Provider):
 class DatabaseProvider(Provider):
     @provide(scope=Scope.APP)
     def get_db(self, app_config: AppConfig) -> Postgres:
-        return Postgres(dsn=app_config.db_config.DB_URL)
+        return Postgres.from_config(app_config.db_config)
 
 
 class RepositoryProvider(Provider):
@@ -60,8 +69,31 @@ class RepositoryProvider(Provider):
     def get_todo_calendar_repository(self, conn: Postgres) -> TodoCalendarRepository:
         return TodoCalendarRepository(conn=conn)
 
+    @provide(scope=Scope.APP)
+    def get_report_job_repository(self, conn: Postgres) -> ReportJobRepository:
+        return ReportJobRepository(conn=conn)
+
 
 class ServiceProvider(Provider):
+    @provide(scope=Scope.APP)
+    def get_password_hasher(self, config: AppConfig) -> PasswordHasher:
+        return PasswordHasher(config=config.password_config)
+
+    @provide(scope=Scope.APP)
+    def get_session_store(
+        self, repo: UserRepository, config: AppConfig
+    ) -> BaseSessionStore:
+        session_config = config.session_config
+        if session_config.SESSION_STORE == "local":
+            return LocalSessionStore()
+        if not session_config.SESSION_CACHE_MAX_ENTRIES:
+            return PostgresSessionStore(user_repo=repo)
+        return CachedSessionStore(
+            backend=PostgresSessionStore(user_repo=repo),
+            max_entries=session_config.SESSION_CACHE_MAX_ENTRIES,
+            ttl=session_config.SESSION_CACHE_TTL,
+        )
+
     @provide(scope=Scope.APP)
     def get_example_service(
         self, client: BaseClient, repo: ExampleRepository
@@ -69,29 +101,65 @@ class ServiceProvider(Provider):
         return ExampleService(base_client=client, example_repo=repo)
 
     @provide(scope=Scope.APP)
-    def get_auth_service(self, repo: UserRepository, config: AppConfig) -> AuthService:
-        return AuthService(user_repo=repo, config=config.jwt_config)
+    def get_auth_service(
+        self,
+        repo: UserRepository,
+        config: AppConfig,
+        password_hasher: PasswordHasher,
+        session_store: BaseSessionStore,
+    ) -> AuthService:
+        return AuthService(
+            user_repo=repo,
+            config=config.jwt_config,
+            password_hasher=password_hasher,
+            session_store=session_store,
+        )
 
     @provide(scope=Scope.APP)
-    def get_llm_service(self, llm_client: LLMClient) -> LLMService:
-        return LLMService(client=llm_client)
+    def get_llm_service(self, llm_client: LLMClient, config: AppConfig) -> LLMService:
+        return LLMService(
+            client=llm_client,
+            speculative_answer=config.llm_config.LLM_SPECULATIVE_ANSWER,
+        )
 
     @provide(scope=Scope.APP)
     def get_calendar_service(
         self,
         calendar_repo: CalendarRepository,
         todo_calendar_repo: TodoCalendarRepository,
+        config: AppConfig,
     ) -> CalendarService:
         return CalendarService(
-            calendar_repo=calendar_repo, todo_calendar_repo=todo_calendar_repo
+            calendar_repo=calendar_repo,
+            todo_calendar_repo=todo_calendar_repo,
+            config=config.calendar_config,
+        )
+
+    @provide(scope=Scope.APP)
+    def get_report_service(
+        self,
+        report_job_repo: ReportJobRepository,
+        llm_service: LLMService,
+        calendar_service: CalendarService,
+        auth_service: AuthService,
+        config: AppConfig,
+    ) -> ReportService:
+        return ReportService(
+            report_job_repo=report_job_repo,
+            llm_service=llm_service,
+            calendar_service=calendar_service,
+            auth_service=auth_service,
+            config=config.report_config,
         )
 
 
 class RouterProvider(Provider):
     @provide(scope=Scope.APP)
-    def get_default_router(self, service: ExampleService) -> DefaultRouter:
+    def get_default_router(
+        self, service: ExampleService, db: Postgres
+    ) -> DefaultRouter:
         return DefaultRouter(
-            example_service=service, base_prefix="/api/v1", tags=["default"]
+            example_service=service, db=db, base_prefix="/api/v1", tags=["default"]
         )
 
     @provide(scope=Scope.APP)
@@ -99,8 +167,19 @@ class RouterProvider(Provider):
         return AuthRouter(auth_service=service, base_prefix="/api/v1", tags=["auth"])
 
     @provide(scope=Scope.APP)
-    def get_llm_router(self, llm_service: LLMService, auth_service: AuthService) -> LLMRouter:
-        return LLMRouter(llm_service=llm_service, auth_service=auth_service, base_prefix="/api/v1", tags=["llm"])
+    def get_llm_router(
+        self,
+        llm_service: LLMService,
+        auth_service: AuthService,
+        report_service: ReportService,
+    ) -> LLMRouter:
+        return LLMRouter(
+            llm_service=llm_service,
+            auth_service=auth_service,
+            report_service=report_service,
+            base_prefix="/api/v1",
+            tags=["llm"],
+        )
 
     @provide(scope=Scope.APP)
     def get_calendar_router(self, calendar_service: CalendarService) -> CalendarRouter:
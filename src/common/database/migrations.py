@@ -0,0 +1,118 @@
+from loguru import logger
+
+from src.common.database.postgres import Postgres
+
+
+class Migration:
+    """
+    Версия схемы. Транзакционная миграция выполняется одной транзакцией;
+    нетранзакционная (например, CREATE INDEX CONCURRENTLY) - по одному
+    выражению, поэтому каждое выражение должно быть идемпотентным.
+    """
+
+    def __init__(
+        self, version: int, name: str, *statements: str, transactional: bool = True
+    ):
+        self.version = version
+        self.name = name
+        self.statements = statements
+        self.transactional = transactional
+
+
+# Неудачная сборка CONCURRENTLY оставляет индекс INVALID, а IF NOT EXISTS
+# при повторном запуске его пропускает; такой индекс удаляем и строим заново
+DROP_INVALID_INDEX = """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM pg_index
+            WHERE indexrelid = to_regclass('"{name}"') AND NOT indisvalid
+        ) THEN
+            DROP INDEX "{name}";
+        END IF;
+    END $$
+"""
+
+CHECK_INDEX_VALID = """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_index
+            WHERE indexrelid = to_regclass('"{name}"') AND indisvalid
+        ) THEN
+            RAISE EXCEPTION 'Index "{name}" is missing or invalid';
+        END IF;
+    END $$
+"""
+
+
+def concurrent_index(name: str, target: str, unique: bool = False) -> tuple[str, ...]:
+    """
+    Выражения нетранзакционной миграции для CREATE INDEX CONCURRENTLY:
+    удалить невалидный остаток прошлой попытки, построить индекс и убедиться,
+    что он валиден. target - таблица и колонки, например '"Session" (user_id)'.
+    """
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    return (
+        DROP_INVALID_INDEX.format(name=name),
+        f'CREATE {kind} CONCURRENTLY IF NOT EXISTS "{name}" ON {target}',
+        CHECK_INDEX_VALID.format(name=name),
+    )
+
+
+class MigrationRunner:
+    # Ключ advisory lock: одновременно миграции применяет только один процесс
+    LOCK_KEY = 7_202_501
+    CREATE_MIGRATION_TABLE = """
+        CREATE TABLE IF NOT EXISTS "SchemaMigration" (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """
+
+    def __init__(self, db: Postgres, migrations: list[Migration]):
+        versions = [migration.version for migration in migrations]
+        if versions != sorted(set(versions)):
+            raise ValueError("Migration versions must be unique and ascending")
+
+        self.db = db
+        self.migrations = migrations
+
+    async def applied_versions(self, connection) -> set[int]:
+        rows = await connection.fetch('SELECT version FROM "SchemaMigration"')
+        return {row["version"] for row in rows}
+
+    async def run(self) -> list[Migration]:
+        """Применить недостающие миграции по порядку версий."""
+        applied = []
+        async with self.db.acquire() as connection:
+            await connection.execute("SELECT pg_advisory_lock($1)", self.LOCK_KEY)
+            try:
+                await connection.execute(self.CREATE_MIGRATION_TABLE)
+                done = await self.applied_versions(connection)
+                for migration in self.migrations:
+                    if migration.version in done:
+                        continue
+
+                    logger.info(
+                        f"Applying migration {migration.version}: {migration.name}"
+                    )
+                    await self._apply(connection, migration)
+                    applied.append(migration)
+            finally:
+                await connection.execute("SELECT pg_advisory_unlock($1)", self.LOCK_KEY)
+        return applied
+
+    async def _apply(self, connection, migration: Migration) -> None:
+        record = 'INSERT INTO "SchemaMigration" (version, name) VALUES ($1, $2)'
+        if migration.transactional:
+            async with connection.transaction():
+                for statement in migration.statements:
+                    await connection.execute(statement)
+                await connection.execute(record, migration.version, migration.name)
+            return
+
+        for statement in migration.statements:
+            await connection.execute(statement)
+        await connection.execute(record, migration.version, migration.name)
@@ -1,19 +1,190 @@
 import asyncio
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Self, cast
 
 import asyncpg
 from asyncpg.pool import Pool
+from asyncpg.prepared_stmt import PreparedStatement
 from loguru import logger
 
+from src.common.errors import ServiceUnavailableError
+from src.models.config import DBConfig
+
+# Выставляется декоратором read_only на время вызова метода репозитория
+_use_replica: ContextVar[bool] = ContextVar("use_replica", default=False)
+
+
+def _routing_decorator(user_arg: str | None, read: bool) -> Callable:
+    def decorator(method: Callable) -> Callable:
+        signature = inspect.signature(method)
+
+        def prepare(self, args, kwargs) -> tuple["Postgres", Any]:
+            user_id = None
+            if user_arg:
+                user_id = signature.bind(self, *args, **kwargs).arguments.get(user_arg)
+            return self._conn, user_id
+
+        def route(db: "Postgres", user_id: Any):
+            return _use_replica.set(read and not db.recently_wrote(user_id))
+
+        if inspect.iscoroutinefunction(method):
+
+            @functools.wraps(method)
+            async def wrapper(self, *args, **kwargs):
+                db, user_id = prepare(self, args, kwargs)
+                token = route(db, user_id)
+                try:
+                    return await method(self, *args, **kwargs)
+                finally:
+                    _use_replica.reset(token)
+                    if not read:
+                        db.track_write(user_id)
+
+        else:
+            # Методы, возвращающие курсор: пул выбирается в момент вызова
+
+            @functools.wraps(method)
+            def wrapper(self, *args, **kwargs):
+                db, user_id = prepare(self, args, kwargs)
+                token = route(db, user_id)
+                try:
+                    return method(self, *args, **kwargs)
+                finally:
+                    _use_replica.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+def read_only(user_arg: str | None = "user_id") -> Callable:
+    """
+    Метод репозитория только читает: его запросы идут на реплику, если
+    пользователь из аргумента user_arg недавно ничего не записывал.
+    """
+    return _routing_decorator(user_arg, read=True)
+
+
+def writes(user_arg: str | None = "user_id") -> Callable:
+    """
+    Метод репозитория пишет данные пользователя: в течение окна
+    read-your-writes его чтения будут идти на основную БД.
+    """
+    return _routing_decorator(user_arg, read=False)
+
+
+class PreparedConnection(asyncpg.Connection):
+    """Соединение, хранящее подготовленные именованные запросы из реестра Postgres."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: dict[str, PreparedStatement] = {}
+        self.created_at = time.monotonic()
+
+
+class PoolMetrics:
+    # Верхние границы корзин гистограммы ожидания соединения, секунды
+    ACQUIRE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self):
+        self.acquire_wait_buckets = [0] * (len(self.ACQUIRE_BUCKETS) + 1)
+        self.acquire_wait_sum = 0.0
+        self.acquire_count = 0
+        self.acquire_timeouts = 0
+        self.in_use = 0
+        self.recycled = 0
+
+    def observe_acquire(self, seconds: float) -> None:
+        self.acquire_wait_buckets[bisect_left(self.ACQUIRE_BUCKETS, seconds)] += 1
+        self.acquire_wait_sum += seconds
+        self.acquire_count += 1
+
+    def snapshot(self) -> dict:
+        histogram, total = {}, 0
+        for bound, count in zip(
+            (*self.ACQUIRE_BUCKETS, "+Inf"), self.acquire_wait_buckets
+        ):
+            total += count
+            histogram[str(bound)] = total
+        return {
+            "acquire_wait_seconds": {
+                "buckets": histogram,
+                "sum": self.acquire_wait_sum,
+                "count": self.acquire_count,
+            },
+            "acquire_timeouts": self.acquire_timeouts,
+            "in_use": self.in_use,
+            "recycled": self.recycled,
+        }
+
 
 class Postgres:
     MAX_CONNECT_ATTEMPTS = 5
     CONNECTION_TIMEOUT = 30
+    ACQUIRE_TIMEOUT = 10
     MIN_POOL_SIZE = 1
     MAX_POOL_SIZE = 10
+    MAX_CONNECTION_LIFETIME = 3600
+    MAX_QUERIES = 50_000
+    MAX_INACTIVE_CONNECTION_LIFETIME = 300
+    READ_YOUR_WRITES_WINDOW = 5
+    MAX_TRACKED_WRITERS = 10_000
+    # Передаются при старте сессии, поэтому переживают RESET ALL при возврате в пул
+    SESSION_SETTINGS = {"jit": "off"}
 
-    def __init__(self, dsn: str):
+    def __init__(
+        self,
+        dsn: str,
+        min_pool_size: int = MIN_POOL_SIZE,
+        max_pool_size: int = MAX_POOL_SIZE,
+        command_timeout: float = CONNECTION_TIMEOUT,
+        acquire_timeout: float = ACQUIRE_TIMEOUT,
+        max_connection_lifetime: float = MAX_CONNECTION_LIFETIME,
+        max_queries: int = MAX_QUERIES,
+        max_inactive_connection_lifetime: float = MAX_INACTIVE_CONNECTION_LIFETIME,
+        replica_dsns: list[str] | None = None,
+        read_your_writes_window: float = READ_YOUR_WRITES_WINDOW,
+    ):
         self.dsn = dsn
+        self.replica_dsns = replica_dsns or []
+        self.read_your_writes_window = read_your_writes_window
+        self.min_pool_size = min_pool_size
+        self.max_pool_size = max_pool_size
+        self.command_timeout = command_timeout
+        self.acquire_timeout = acquire_timeout
+        self.max_connection_lifetime = max_connection_lifetime
+        self.max_queries = max_queries
+        self.max_inactive_connection_lifetime = max_inactive_connection_lifetime
         self._pool: Pool | None = None
+        self._replica_pools: list[Pool] = []
+        self._next_replica = 0
+        # Время последней записи по пользователям (в пределах процесса)
+        self._last_writes: dict[str, float] = {}
+        self._statements: dict[str, str] = {}
+        self.prepared_hits = 0
+        self.prepared_misses = 0
+        self.metrics = PoolMetrics()
+
+    @classmethod
+    def from_config(cls, config: DBConfig) -> Self:
+        return cls(
+            dsn=config.DB_URL,
+            min_pool_size=config.DB_MIN_POOL_SIZE,
+            max_pool_size=config.DB_MAX_POOL_SIZE,
+            command_timeout=config.DB_COMMAND_TIMEOUT,
+            acquire_timeout=config.DB_ACQUIRE_TIMEOUT,
+            max_connection_lifetime=config.DB_MAX_CONNECTION_LIFETIME,
+            max_queries=config.DB_MAX_QUERIES,
+            max_inactive_connection_lifetime=config.DB_MAX_INACTIVE_CONNECTION_LIFETIME,
+            replica_dsns=config.replica_urls,
+            read_your_writes_window=config.DB_READ_YOUR_WRITES_WINDOW,
+        )
 
     @property
     def pool(self) -> Pool:
@@ -22,22 +193,212 @@ class Postgres:
 
         return self._pool
 
+    def read_pool(self) -> Pool:
+        """Пул для чтения: реплики по кругу, без реплик - основной пул."""
+        if not self._replica_pools:
+            return self.pool
+
+        self._next_replica = (self._next_replica + 1) % len(self._replica_pools)
+        return self._replica_pools[self._next_replica]
+
+    def track_write(self, user_id: Any) -> None:
+        if user_id is None or not self.read_your_writes_window:
+            return
+
+        now = time.monotonic()
+        if len(self._last_writes) >= self.MAX_TRACKED_WRITERS:
+            self._last_writes = {
+                user: written_at
+                for user, written_at in self._last_writes.items()
+                if now - written_at < self.read_your_writes_window
+            }
+        self._last_writes[str(user_id)] = now
+
+    def recently_wrote(self, user_id: Any) -> bool:
+        if user_id is None:
+            return False
+
+        written_at = self._last_writes.get(str(user_id))
+        return (
+            written_at is not None
+            and time.monotonic() - written_at < self.read_your_writes_window
+        )
+
+    @asynccontextmanager
+    async def acquire(self, replica: bool = False) -> AsyncIterator[PreparedConnection]:
+        """
+        Соединение из пула с учётом метрик. Если свободного соединения нет
+        дольше acquire_timeout, отвечаем 503. Слишком старые соединения
+        закрываются при возврате, и пул создаёт новые.
+        """
+        pool = self.read_pool() if replica else self.pool
+        started = time.monotonic()
+        try:
+            connection = await pool.acquire(timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.metrics.acquire_timeouts += 1
+            logger.warning("Timed out waiting for a database connection")
+            raise ServiceUnavailableError(detail="Database is overloaded")
+
+        self.metrics.observe_acquire(time.monotonic() - started)
+        # Прокси пула передаёт атрибуты соединению класса PreparedConnection
+        prepared = cast(PreparedConnection, connection)
+        self.metrics.in_use += 1
+        try:
+            yield prepared
+        finally:
+            self.metrics.in_use -= 1
+            if time.monotonic() - prepared.created_at > self.max_connection_lifetime:
+                self.metrics.recycled += 1
+                connection.terminate()
+            await pool.release(connection)
+
+    def register(self, name: str, query: str) -> str:
+        """
+        Добавить именованный запрос в реестр. Зарегистрированные запросы
+        подготавливаются при создании каждого нового соединения пула.
+        """
+        registered = self._statements.setdefault(name, query)
+        if registered != query:
+            raise ValueError(f"Statement {name} is already registered")
+        return name
+
+    async def _setup_connection(self, connection: asyncpg.Connection) -> None:
+        # init пула получает соединение connection_class, то есть PreparedConnection
+        prepared = cast(PreparedConnection, connection).prepared
+        for name, query in list(self._statements.items()):
+            try:
+                prepared[name] = await connection.prepare(query)
+            except asyncpg.PostgresError as e:
+                # Запрос будет подготовлен при первом вызове
+                logger.warning(f"Failed to prepare statement {name}: {e}")
+
+    async def statement(self, connection, name: str) -> PreparedStatement:
+        prepared = connection.prepared.get(name)
+        if prepared is not None:
+            self.prepared_hits += 1
+            return prepared
+
+        self.prepared_misses += 1
+        prepared = await connection.prepare(self._statements[name])
+        connection.prepared[name] = prepared
+        return prepared
+
+    async def fetch(self, name: str, query: str, *args, connection=None) -> list:
+        self.register(name, query)
+        if connection is not None:
+            return await (await self.statement(connection, name)).fetch(*args)
+        async with self.acquire(replica=_use_replica.get()) as connection:
+            return await (await self.statement(connection, name)).fetch(*args)
+
+    async def fetchrow(self, name: str, query: str, *args, connection=None):
+        self.register(name, query)
+        if connection is not None:
+            return await (await self.statement(connection, name)).fetchrow(*args)
+        async with self.acquire(replica=_use_replica.get()) as connection:
+            return await (await self.statement(connection, name)).fetchrow(*args)
+
+    async def execute(self, name: str, query: str, *args, connection=None) -> str:
+        """Выполнить запрос без результата; возвращает статус, как Connection.execute."""
+        self.register(name, query)
+        if connection is not None:
+            prepared = await self.statement(connection, name)
+            await prepared.fetch(*args)
+            return prepared.get_statusmsg() or ""
+        async with self.acquire() as connection:
+            prepared = await self.statement(connection, name)
+            await prepared.fetch(*args)
+            return prepared.get_statusmsg() or ""
+
+    def iterate(
+        self,
+        name: str,
+        query: str,
+        *args,
+        prefetch: int = 500,
+        idle_timeout: float | None = None,
+    ) -> AsyncIterator[asyncpg.Record]:
+        """
+        Читать результат серверным курсором порциями по prefetch строк,
+        не загружая его в память целиком. Если потребитель не забирает строки
+        дольше idle_timeout секунд, сервер закрывает соединение вместе с транзакцией.
+        """
+        self.register(name, query)
+        return self._iterate(
+            name, args, prefetch, idle_timeout, replica=_use_replica.get()
+        )
+
+    async def _iterate(
+        self,
+        name: str,
+        args: tuple,
+        prefetch: int,
+        idle_timeout: float | None,
+        replica: bool,
+    ) -> AsyncIterator[asyncpg.Record]:
+        async with self.acquire(replica=replica) as connection:
+            async with connection.transaction():
+                if idle_timeout:
+                    await connection.execute(
+                        "SET LOCAL idle_in_transaction_session_timeout = "
+                        f"{int(idle_timeout * 1000)}"
+                    )
+                prepared = await self.statement(connection, name)
+                async for record in prepared.cursor(*args, prefetch=prefetch):
+                    yield record
+
+    @staticmethod
+    def _pool_stats(pool: Pool) -> dict[str, int]:
+        return {
+            "size": pool.get_size(),
+            "idle": pool.get_idle_size(),
+            "min_size": pool.get_min_size(),
+            "max_size": pool.get_max_size(),
+        }
+
+    def stats(self) -> dict:
+        total = self.prepared_hits + self.prepared_misses
+        pool = self._pool_stats(self._pool) if self._pool else {}
+        return {
+            "statements": len(self._statements),
+            "prepared_hits": self.prepared_hits,
+            "prepared_misses": self.prepared_misses,
+            "prepared_hit_rate": self.prepared_hits / total if total else 0.0,
+            "pool": pool | self.metrics.snapshot(),
+            "replicas": [self._pool_stats(replica) for replica in self._replica_pools],
+        }
+
     async def connect(self) -> Pool:
         if self._pool:
             return self._pool
 
+        self._pool = await self._create_pool(self.dsn)
+        for dsn in self.replica_dsns:
+            try:
+                self._replica_pools.append(await self._create_pool(dsn))
+            except ConnectionError:
+                # Без реплики чтения продолжат идти на основную БД
+                logger.error("Replica is unavailable, skipping it")
+        return self._pool
+
+    async def _create_pool(self, dsn: str) -> Pool:
         attempt = 0
 
         while attempt < self.MAX_CONNECT_ATTEMPTS:
             try:
-                self._pool = await asyncpg.create_pool(
-                    self.dsn,
-                    min_size=self.MIN_POOL_SIZE,
-                    max_size=self.MAX_POOL_SIZE,
-                    command_timeout=self.CONNECTION_TIMEOUT,
+                pool = await asyncpg.create_pool(
+                    dsn,
+                    min_size=self.min_pool_size,
+                    max_size=self.max_pool_size,
+                    command_timeout=self.command_timeout,
+                    max_queries=self.max_queries,
+                    max_inactive_connection_lifetime=self.max_inactive_connection_lifetime,
+                    connection_class=PreparedConnection,
+                    server_settings=self.SESSION_SETTINGS,
+                    init=self._setup_connection,
                 )
                 logger.info("Successfully connected to database")
-                return self._pool  # noqa: TRY300
+                return pool  # noqa: TRY300
             except Exception as e:
                 logger.error(
                     f"Failed to connect to db (attempt {attempt + 1}/{self.MAX_CONNECT_ATTEMPTS}): {str(e)}"
@@ -48,6 +409,13 @@ class Postgres:
         raise ConnectionError("Could not connect to db")  # noqa: EM101, TRY003
 
     async def disconnect(self) -> None:
+        for replica in self._replica_pools:
+            try:
+                await replica.close()
+            except Exception as e:
+                logger.error(f"Error closing replica connection: {str(e)}")
+        self._replica_pools = []
+
         if self._pool:
             try:
                 await self._pool.close()
@@ -0,0 +1,244 @@
+from src.common.database.migrations import Migration, concurrent_index
+
+# Базовые таблицы; IF NOT EXISTS, чтобы миграция не мешала уже развёрнутым БД
+INITIAL_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS "User" (
+        id UUID PRIMARY KEY,
+        first_name TEXT NOT NULL,
+        second_name TEXT NOT NULL,
+        email TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL,
+        test_id UUID,
+        onboarding_test_id UUID,
+        created_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+    );
+
+    CREATE TABLE IF NOT EXISTS "OnboardingTestResult" (
+        id UUID PRIMARY KEY,
+        result TEXT NOT NULL,
+        personality_type TEXT,
+        user_id UUID NOT NULL REFERENCES "User" (id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE IF NOT EXISTS "Session" (
+        id UUID PRIMARY KEY,
+        user_id UUID NOT NULL REFERENCES "User" (id) ON DELETE CASCADE,
+        session_token TEXT NOT NULL,
+        created_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+        expire_in TIMESTAMP NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS "MoodType" (
+        id UUID PRIMARY KEY,
+        name TEXT NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS "ActivityType" (
+        id UUID PRIMARY KEY,
+        name TEXT NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS "Calendar" (
+        id UUID PRIMARY KEY,
+        date DATE NOT NULL,
+        mood_type_id UUID REFERENCES "MoodType" (id),
+        user_id UUID NOT NULL REFERENCES "User" (id) ON DELETE CASCADE,
+        UNIQUE (user_id, date)
+    );
+
+    CREATE TABLE IF NOT EXISTS "Mood" (
+        id UUID PRIMARY KEY,
+        mood_type_id UUID REFERENCES "MoodType" (id),
+        activity_type_id UUID REFERENCES "ActivityType" (id),
+        time_start TEXT,
+        time_end TEXT,
+        calendar_id UUID NOT NULL REFERENCES "Calendar" (id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE IF NOT EXISTS "ToDoCalendar" (
+        id UUID PRIMARY KEY,
+        date DATE NOT NULL,
+        user_id UUID NOT NULL REFERENCES "User" (id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE IF NOT EXISTS "ToDoMood" (
+        id UUID PRIMARY KEY,
+        advice TEXT,
+        checkbox BOOLEAN NOT NULL DEFAULT FALSE,
+        time_start TEXT,
+        time_end TEXT,
+        todo_calendar_id UUID NOT NULL REFERENCES "ToDoCalendar" (id) ON DELETE CASCADE,
+        mood_type_id UUID REFERENCES "MoodType" (id)
+    );
+"""
+
+MOOD_DAILY_ROLLUP = """
+    CREATE TABLE IF NOT EXISTS "MoodDailyRollup" (
+        user_id UUID NOT NULL,
+        date DATE NOT NULL,
+        total INTEGER NOT NULL DEFAULT 0,
+        morning INTEGER NOT NULL DEFAULT 0,
+        afternoon INTEGER NOT NULL DEFAULT 0,
+        evening INTEGER NOT NULL DEFAULT 0,
+        night INTEGER NOT NULL DEFAULT 0,
+        mood_type_counts JSONB NOT NULL DEFAULT '{}'::jsonb,
+        activity_type_counts JSONB NOT NULL DEFAULT '{}'::jsonb,
+        PRIMARY KEY (user_id, date)
+    )
+"""
+
+# Заполнение сводки по уже существующим настроениям. Копия запроса на момент
+# миграции: MOOD_ROLLUP_SQL в репозитории может меняться, применённая миграция - нет
+MOOD_DAILY_ROLLUP_BACKFILL = r"""
+    WITH moods AS (
+        SELECT
+            c.user_id,
+            c.date,
+            COALESCE(m.mood_type_id::text, 'None') AS mood_type_key,
+            COALESCE(m.activity_type_id::text, 'None') AS activity_type_key,
+            CASE
+                WHEN m.time_start IS NULL
+                    OR m.time_start !~ '^([01]?\d|2[0-3]):[0-5]\d$' THEN NULL
+                WHEN m.time_start::time < '12:00' THEN 'morning'
+                WHEN m.time_start::time < '17:00' THEN 'afternoon'
+                WHEN m.time_start::time < '22:00' THEN 'evening'
+                ELSE 'night'
+            END AS bucket
+        FROM "Mood" AS m
+        JOIN "Calendar" AS c ON c.id = m.calendar_id
+    ),
+    days AS (
+        SELECT
+            user_id,
+            date,
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE bucket = 'morning') AS morning,
+            COUNT(*) FILTER (WHERE bucket = 'afternoon') AS afternoon,
+            COUNT(*) FILTER (WHERE bucket = 'evening') AS evening,
+            COUNT(*) FILTER (WHERE bucket = 'night') AS night
+        FROM moods
+        GROUP BY user_id, date
+    ),
+    mood_types AS (
+        SELECT user_id, date, jsonb_object_agg(mood_type_key, amount) AS counts
+        FROM (
+            SELECT user_id, date, mood_type_key, COUNT(*) AS amount
+            FROM moods
+            GROUP BY user_id, date, mood_type_key
+        ) AS grouped
+        GROUP BY user_id, date
+    ),
+    activity_types AS (
+        SELECT user_id, date, jsonb_object_agg(activity_type_key, amount) AS counts
+        FROM (
+            SELECT user_id, date, activity_type_key, COUNT(*) AS amount
+            FROM moods
+            GROUP BY user_id, date, activity_type_key
+        ) AS grouped
+        GROUP BY user_id, date
+    )
+    INSERT INTO "MoodDailyRollup" (
+        user_id, date, total, morning, afternoon, evening, night,
+        mood_type_counts, activity_type_counts
+    )
+    SELECT
+        d.user_id, d.date, d.total, d.morning, d.afternoon, d.evening, d.night,
+        mt.counts, at.counts
+    FROM days AS d
+    JOIN mood_types AS mt USING (user_id, date)
+    JOIN activity_types AS at USING (user_id, date)
+    ON CONFLICT DO NOTHING
+"""
+
+REPORT_JOB = """
+    CREATE TABLE IF NOT EXISTS "ReportJob" (
+        id UUID PRIMARY KEY,
+        user_id UUID NOT NULL,
+        start_date DATE NOT NULL,
+        end_date DATE NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        result TEXT,
+        error TEXT,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        started_at TIMESTAMPTZ,
+        finished_at TIMESTAMPTZ,
+        locked_until TIMESTAMPTZ
+    );
+    CREATE INDEX IF NOT EXISTS "ReportJob_queue_idx"
+        ON "ReportJob" (created_at) WHERE status IN ('pending', 'running');
+    CREATE INDEX IF NOT EXISTS "ReportJob_user_id_idx" ON "ReportJob" (user_id);
+"""
+
+MIGRATIONS = [
+    Migration(1, "initial_schema", INITIAL_SCHEMA),
+    Migration(
+        2,
+        "mood_daily_rollup",
+        MOOD_DAILY_ROLLUP,
+        MOOD_DAILY_ROLLUP_BACKFILL,
+    ),
+    Migration(3, "report_job", REPORT_JOB),
+    # Индексы под горячие запросы; CONCURRENTLY не блокирует запись в таблицы
+    Migration(
+        4,
+        "hot_query_indexes",
+        *concurrent_index(
+            "Calendar_user_id_date_key", '"Calendar" (user_id, date)', unique=True
+        ),
+        # Уникальность даты должна быть в пределах пользователя, а не всей таблицы
+        'ALTER TABLE "Calendar" DROP CONSTRAINT IF EXISTS "Calendar_date_key"',
+        *concurrent_index(
+            "Mood_calendar_id_time_start_idx",
+            """"Mood" (calendar_id, (COALESCE(time_start, '00:00')), id)""",
+        ),
+        *concurrent_index(
+            "Session_session_token_idx", '"Session" USING hash (session_token)'
+        ),
+        *concurrent_index("Session_user_id_idx", '"Session" (user_id)'),
+        *concurrent_index(
+            "OnboardingTestResult_user_id_idx", '"OnboardingTestResult" (user_id)'
+        ),
+        *concurrent_index(
+            "ToDoCalendar_user_id_date_idx", '"ToDoCalendar" (user_id, date)'
+        ),
+        *concurrent_index(
+            "ToDoMood_todo_calendar_id_time_start_idx",
+            '"ToDoMood" (todo_calendar_id, time_start)',
+        ),
+        transactional=False,
+    ),
+    # Одна сессия на пользователя: вход делает upsert по user_id
+    Migration(
+        5,
+        "session_user_unique",
+        """
+        DELETE FROM "Session" AS s
+        USING "Session" AS newer
+        WHERE newer.user_id = s.user_id
+            AND (newer.created_at, newer.id) > (s.created_at, s.id)
+        """,
+        # Если вход старым кодом успел создать дубль, сборка упадёт, а повторный
+        # запуск удалит невалидный индекс и начнёт заново с удаления дублей
+        *concurrent_index("Session_user_id_key", '"Session" (user_id)', unique=True),
+        'DROP INDEX CONCURRENTLY IF EXISTS "Session_user_id_idx"',
+        transactional=False,
+    ),
+    # Ответы теста EPI строкой из 57 символов 0/1 для пересчёта результатов
+    Migration(
+        6,
+        "onboarding_test_responses",
+        'ALTER TABLE "OnboardingTestResult" ADD COLUMN IF NOT EXISTS responses TEXT',
+    ),
+    # Версия данных календаря пользователя для ETag; растёт при каждой записи
+    Migration(
+        7,
+        "user_data_version",
+        """
+        CREATE TABLE IF NOT EXISTS "UserDataVersion" (
+            user_id UUID PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+        """,
+    ),
+]
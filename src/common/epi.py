@@ -0,0 +1,116 @@
+from collections.abc import Iterable, Sequence
+
+from src.common.const import E_KEYS, L_KEYS, N_KEYS
+
+QUESTIONS = 57
+ALL_QUESTIONS = (1 << QUESTIONS) - 1
+# Балл шкалы L, начиная с которого ответы считаются возможно искажёнными
+L_THRESHOLD = 5
+# Середина шкал E и N (по 24 вопроса): выше - экстраверт / высокая нейротичность
+E_THRESHOLD = 12
+N_THRESHOLD = 12
+
+
+class EPIScale:
+    """
+    Шкала, скомпилированная в битовые маски: бит i соответствует вопросу i + 1.
+    Балл - число совпавших ответов "Да" по yes_mask и "Нет" по no_mask.
+    """
+
+    __slots__ = ("yes_mask", "no_mask", "max_score")
+
+    def __init__(self, keys: Sequence[int]):
+        self.yes_mask = 0
+        self.no_mask = 0
+        for key in keys:
+            if key > 0:
+                self.yes_mask |= 1 << (key - 1)
+            else:
+                self.no_mask |= 1 << (-key - 1)
+        self.max_score = len(keys)
+
+    def score(self, answers: int) -> int:
+        return (answers & self.yes_mask).bit_count() + (
+            ~answers & self.no_mask
+        ).bit_count()
+
+
+E_SCALE = EPIScale(E_KEYS)
+N_SCALE = EPIScale(N_KEYS)
+L_SCALE = EPIScale(L_KEYS)
+
+
+def pack_answers(responses: Sequence[bool]) -> int:
+    if len(responses) != QUESTIONS:
+        raise ValueError("Ожидается список длины 57 (пункты 1..57).")
+    answers = 0
+    for index, answer in enumerate(responses):
+        if answer:
+            answers |= 1 << index
+    return answers
+
+
+def parse_bitstring(bitstring: str) -> int:
+    """Компактный формат ответов: 57 символов "0"/"1", первый - вопрос 1."""
+    if len(bitstring) != QUESTIONS or set(bitstring) - {"0", "1"}:
+        raise ValueError("Ожидается строка из 57 символов 0/1 (пункты 1..57).")
+    return int(bitstring[::-1], 2)
+
+
+def to_bitstring(answers: int) -> str:
+    return format(answers & ALL_QUESTIONS, f"0{QUESTIONS}b")[::-1]
+
+
+def personality_type(e: int, n: int) -> str:
+    """Тип темперамента по квадранту Айзенка."""
+    if e > E_THRESHOLD:
+        return "Холерик" if n > N_THRESHOLD else "Сангвиник"
+    return "Меланхолик" if n > N_THRESHOLD else "Флегматик"
+
+
+def score_answers(answers: int) -> dict[str, object]:
+    """Баллы и интерпретация для упакованных ответов одного респондента."""
+    e = E_SCALE.score(answers)
+    n = N_SCALE.score(answers)
+    lie = L_SCALE.score(answers)
+
+    res: dict[str, object] = {
+        "E_raw": e,
+        "E_max": E_SCALE.max_score,
+        "N_raw": n,
+        "N_max": N_SCALE.max_score,
+        "L_raw": lie,
+        "L_max": L_SCALE.max_score,
+        "personality_type": personality_type(e, n),
+    }
+
+    interp = []
+    # Lie scale: обычно L >= 5 → вероятна социально-желательная искаженность ответов
+    if lie >= L_THRESHOLD:
+        interp.append(
+            f"Lie scale {lie}/{res['L_max']}: возможна попытка выглядеть лучше (ответы могут быть искажены)."
+        )
+    else:
+        interp.append(
+            f"Lie scale {lie}/{res['L_max']}: нет сильных признаков фальсификации."
+        )
+
+    # Extraversion
+    interp.append(
+        f"E (Extraversion): {e}/{res['E_max']} (чем выше — более экстравертированы)."
+    )
+
+    # Neuroticism
+    interp.append(f"N (Neuroticism): {n}/{res['N_max']} (чем выше — более невротичны).")
+
+    res["interpretation"] = interp
+
+    return res
+
+
+def score_batch(bitstrings: Iterable[str]) -> list[dict[str, object]]:
+    """
+    Оценка сохранённых ответов по одному респонденту за раз: для каждого
+    три AND и подсчёт бит по скомпилированным маскам, без обхода ключей.
+    """
+    return [score_answers(parse_bitstring(bitstring)) for bitstring in bitstrings]
@@ -24,6 +24,11 @@ class UnauthorizedError(HTTPException):
         super().__init__(status_code=HTTPStatus.UNAUTHORIZED, detail=detail)
 
 
+class ForbiddenError(HTTPException):
+    def __init__(self, detail: str = "Forbidden"):
+        super().__init__(status_code=HTTPStatus.FORBIDDEN, detail=detail)
+
+
 class InternalServerError(HTTPException):
     def __init__(self, detail: str = "Internal Server Error"):
         super().__init__(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=detail)
@@ -34,6 +39,16 @@ class ConflictError(HTTPException):
         super().__init__(status_code=HTTPStatus.CONFLICT, detail=detail)
 
 
+class ServiceUnavailableError(HTTPException):
+    def __init__(self, detail: str = "Service Unavailable"):
+        super().__init__(status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail=detail)
+
+
+class GatewayTimeoutError(HTTPException):
+    def __init__(self, detail: str = "Gateway Timeout"):
+        super().__init__(status_code=HTTPStatus.GATEWAY_TIMEOUT, detail=detail)
+
+
 def asyncpg_errors_decorator(func):
     async def inner(*args, **kwargs):
         try:
@@ -0,0 +1,149 @@
+import sys
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Iterator
+
+from asyncpg import Record
+
+Month = tuple[int, int]
+
+
+def month_of(day: date) -> Month:
+    return day.year, day.month
+
+
+def month_bounds(month: Month) -> tuple[date, date]:
+    year, number = month
+    start = date(year, number, 1)
+    if number == 12:
+        return start, date(year, 12, 31)
+    return start, date(year, number + 1, 1) - timedelta(days=1)
+
+
+def months_between(start_date: date, end_date: date) -> Iterator[Month]:
+    month = month_of(start_date)
+    while month <= month_of(end_date):
+        yield month
+        year, number = month
+        month = (year + 1, 1) if number == 12 else (year, number + 1)
+
+
+def entry_key(entry: Record) -> tuple:
+    return entry["date"], entry["id"]
+
+
+def mood_key(mood: Record) -> tuple:
+    return mood["date"], mood["time_start"] or "00:00", mood["id"]
+
+
+def _rows_size(rows: list[Record]) -> int:
+    # Оценка снизу: сами записи и их значения, без разделяемых объектов
+    return sys.getsizeof(rows) + sum(
+        sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values())
+        for row in rows
+    )
+
+
+class MonthView:
+    """
+    Записи календаря и настроения пользователя за один месяц.
+    entries упорядочены как в выдаче /entries (date, id по убыванию),
+    moods - как в /moods/period (date, time_start, id по возрастанию).
+    """
+
+    __slots__ = ("entries", "moods", "nbytes")
+
+    def __init__(self, entries: list[Record], moods: list[Record]):
+        self.entries = sorted(entries, key=entry_key, reverse=True)
+        self.moods = sorted(moods, key=mood_key)
+        self.nbytes = _rows_size(self.entries) + _rows_size(self.moods)
+
+
+class MonthViewCache:
+    """
+    LRU месячных представлений (user_id, месяц) с ограничением по памяти.
+    Представления загружаются с основной БД, поэтому не старее последней
+    записи через CalendarService. Кеш локален для процесса: записи, сделанные
+    в обход CalendarService или другим процессом, он не увидит.
+    """
+
+    MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._views: OrderedDict[tuple[str, Month], MonthView] = OrderedDict()
+        # Загрузки в процессе и месяцы, изменённые во время загрузки:
+        # такой результат уже устарел и в кеш не попадает
+        self._loading: dict[tuple[str, Month], int] = {}
+        self._stale: set[tuple[str, Month]] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def __len__(self) -> int:
+        return len(self._views)
+
+    async def get_or_load(
+        self,
+        user_id,
+        month: Month,
+        load: Callable[[], Awaitable[MonthView]],
+    ) -> MonthView:
+        key = (str(user_id), month)
+        view = self._views.get(key)
+        if view is not None:
+            self.hits += 1
+            self._views.move_to_end(key)
+            return view
+
+        self.misses += 1
+        self._loading[key] = self._loading.get(key, 0) + 1
+        try:
+            view = await load()
+        finally:
+            remaining = self._loading.pop(key) - 1
+            stale = key in self._stale
+            if remaining:
+                self._loading[key] = remaining
+            else:
+                self._stale.discard(key)
+
+        if not stale:
+            self._remember(key, view)
+        return view
+
+    def _remember(self, key: tuple[str, Month], view: MonthView) -> None:
+        if view.nbytes > self.max_bytes:
+            return
+
+        self._forget(key)
+        self._views[key] = view
+        self.nbytes += view.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._views.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def _forget(self, key: tuple[str, Month]) -> None:
+        view = self._views.pop(key, None)
+        if view is not None:
+            self.nbytes -= view.nbytes
+
+    def invalidate(self, user_id, day: date) -> None:
+        """Сбросить месяц, в который попадает day."""
+        key = (str(user_id), month_of(day))
+        self._forget(key)
+        if key in self._loading:
+            self._stale.add(key)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._views),
+            "nbytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
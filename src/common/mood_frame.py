@@ -0,0 +1,95 @@
+from array import array
+from collections import Counter
+from typing import Iterable, Self, Sequence
+from uuid import UUID
+
+TIME_OF_DAY = ("morning", "afternoon", "evening", "night")
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# Корзина времени суток по минуте от начала дня, последний элемент - для -1
+_TIME_OF_DAY_BY_MINUTE = (
+    [0] * 12 * 60 + [1] * 5 * 60 + [2] * 5 * 60 + [3] * 2 * 60 + [None]
+)
+
+
+class MoodFrame:
+    """
+    Настроения пользователя в колоночном виде: по массиву на признак вместо
+    словаря на строку. Строки упорядочены по дате.
+      days - порядковые номера дат (date.toordinal)
+      minutes - минута начала от полуночи, -1 если время неизвестно
+      mood_types / activity_types - индексы в mood_type_ids / activity_type_ids
+    """
+
+    __slots__ = (
+        "days",
+        "minutes",
+        "mood_types",
+        "activity_types",
+        "mood_type_ids",
+        "activity_type_ids",
+    )
+
+    def __init__(
+        self,
+        days: array,
+        minutes: array,
+        mood_types: array,
+        activity_types: array,
+        mood_type_ids: list[UUID | None],
+        activity_type_ids: list[UUID | None],
+    ):
+        self.days = days
+        self.minutes = minutes
+        self.mood_types = mood_types
+        self.activity_types = activity_types
+        self.mood_type_ids = mood_type_ids
+        self.activity_type_ids = activity_type_ids
+
+    @staticmethod
+    def _encode(values: list[UUID | None]) -> tuple[array, list[UUID | None]]:
+        index: dict[UUID | None, int] = {}
+        codes = array("H", [index.setdefault(value, len(index)) for value in values])
+        return codes, list(index)
+
+    @classmethod
+    def from_columns(
+        cls,
+        days: list[int],
+        minutes: list[int],
+        mood_type_ids: list[UUID | None],
+        activity_type_ids: list[UUID | None],
+    ) -> Self:
+        mood_types, mood_type_index = cls._encode(mood_type_ids)
+        activity_types, activity_type_index = cls._encode(activity_type_ids)
+        return cls(
+            array("i", days),
+            array("h", minutes),
+            mood_types,
+            activity_types,
+            mood_type_index,
+            activity_type_index,
+        )
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def mood_type_counts_by(self, bucket: str) -> dict[str, dict[str, int]]:
+        """Распределение типов настроения по корзинам: time_of_day или weekday."""
+        keys: Iterable[int | None]
+        labels: Sequence[str]
+        if bucket == "weekday":
+            keys = ((day - 1) % 7 for day in self.days)
+            labels = WEEKDAYS
+        else:
+            keys = map(_TIME_OF_DAY_BY_MINUTE.__getitem__, self.minutes)
+            labels = TIME_OF_DAY
+
+        # Настроения без времени (корзина None) в распределение не попадают
+        counts = Counter(
+            (key, code) for key, code in zip(keys, self.mood_types) if key is not None
+        )
+        result: dict[str, dict[str, int]] = {}
+        for (key, code), total in sorted(counts.items()):
+            result.setdefault(labels[key], {})[str(self.mood_type_ids[code])] = total
+        return result
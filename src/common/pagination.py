@@ -0,0 +1,36 @@
+import base64
+import json
+from typing import Any, Callable
+
+from src.common.cache import dump_json
+from src.common.errors import BadRequestError
+
+
+def encode_cursor(*values: Any) -> str:
+    """Непрозрачный курсор: ключ последней строки страницы в base64url."""
+    return base64.urlsafe_b64encode(dump_json(values)).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, *converters: Callable[[Any], Any]) -> tuple:
+    """Разобрать курсор, приводя каждое значение ключа своим конвертером."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(converters):
+            raise ValueError("Cursor has wrong shape")
+        return tuple(convert(value) for convert, value in zip(converters, values))
+    except (ValueError, TypeError) as e:
+        raise BadRequestError(detail="Invalid cursor") from e
+
+
+def paginate(
+    rows: list, limit: int, key: Callable[[Any], tuple]
+) -> tuple[list, str | None]:
+    """
+    Страница из rows, запрошенных с LIMIT limit + 1: лишняя строка
+    означает, что есть следующая страница.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
@@ -0,0 +1,70 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import bcrypt
+from loguru import logger
+
+from src.common.errors import ServiceUnavailableError
+from src.models.config import PasswordConfig
+
+
+def _hash_password(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+def _check_password(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+class PasswordHasher:
+    """
+    Выполняет bcrypt в отдельном пуле, не блокируя event loop.
+    Если в очереди больше PASSWORD_MAX_PENDING задач, сразу отвечаем 503.
+    """
+
+    def __init__(self, config: PasswordConfig):
+        self.config = config
+        self.rounds = config.BCRYPT_ROUNDS
+        self._pending = 0
+        self._executor: Executor = self._create_executor(config)
+
+    @staticmethod
+    def _create_executor(config: PasswordConfig) -> Executor:
+        if config.PASSWORD_EXECUTOR == "process":
+            return ProcessPoolExecutor(max_workers=config.PASSWORD_WORKERS)
+        return ThreadPoolExecutor(
+            max_workers=config.PASSWORD_WORKERS, thread_name_prefix="bcrypt"
+        )
+
+    async def _run(self, func, *args):
+        if self._pending >= self.config.PASSWORD_MAX_PENDING:
+            logger.warning(f"Password executor saturated: {self._pending} pending")
+            raise ServiceUnavailableError(detail="Too many authentication requests")
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        hashed = await self._run(_hash_password, password.encode(), self.rounds)
+        return hashed.decode()
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(_check_password, password.encode(), hashed.encode())
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Хеш вида $2b$12$... создан с другой стоимостью, чем настроена сейчас."""
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
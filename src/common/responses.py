@@ -0,0 +1,16 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from src.common.cache import dump_json
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON-ответ, который кодируется сразу в байты через dump_json.
+    Возвращается из обработчика напрямую, поэтому FastAPI не прогоняет
+    данные через jsonable_encoder; схема берётся из response_model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
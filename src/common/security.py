@@ -1,9 +1,14 @@
+import hashlib
+import time
+from collections import OrderedDict
+
 import jwt
-from fastapi import Header, Security
+from fastapi import Depends, Header, Request, Security
 from fastapi.security import APIKeyHeader
 
 from src.common.config import app_config
-from src.common.errors import UnauthorizedError
+from src.common.errors import ForbiddenError, UnauthorizedError
+from src.interfaces.session_store import BaseSessionStore
 from src.models.auth_pyd import JWTRequestPayload
 
 
@@ -12,9 +17,81 @@ session_token_header = APIKeyHeader(
 )
 
 
-def verify_token(
+class VerifiedTokenCache:
+    """
+    LRU уже проверенных токенов: повторный запрос с тем же токеном
+    не проверяет подпись и не собирает payload заново.
+    Запись живёт до exp токена или до logout.
+    """
+
+    MAX_SIZE = 10_000
+
+    def __init__(self, max_size: int = MAX_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[bytes, JWTRequestPayload] = OrderedDict()
+
+    @staticmethod
+    def _key(session_token: str) -> bytes:
+        return hashlib.sha256(session_token.encode()).digest()
+
+    def get(self, session_token: str) -> JWTRequestPayload | None:
+        key = self._key(session_token)
+        payload = self._items.get(key)
+        if payload is None:
+            self.misses += 1
+            return None
+
+        if payload.exp <= time.time():
+            del self._items[key]
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, session_token: str, payload: JWTRequestPayload) -> None:
+        key = self._key(session_token)
+        self._items[key] = payload
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def discard(self, session_token: str | None) -> None:
+        if session_token:
+            self._items.pop(self._key(session_token), None)
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+verified_token_cache = VerifiedTokenCache()
+
+
+async def verify_token(
+    request: Request,
     session_token: str = Security(session_token_header),
 ) -> JWTRequestPayload:
+    payload = _decode_token(session_token)
+
+    # Подпись проверяет только, что токен выпущен нами; отозванную через logout
+    # сессию видно лишь в хранилище (в установившемся режиме - из памяти)
+    session_store: BaseSessionStore = request.app.state.dishka_container.get(
+        BaseSessionStore
+    )
+    if await session_store.get(session_token) is None:
+        verified_token_cache.discard(session_token)
+        raise UnauthorizedError(detail="Session not found")
+    return payload
+
+
+def _decode_token(session_token: str) -> JWTRequestPayload:
+    payload = verified_token_cache.get(session_token)
+    if payload is not None:
+        return payload
+
     try:
         decoded_token: dict = jwt.decode(
             session_token,
@@ -25,4 +102,15 @@ def verify_token(
     except jwt.exceptions.PyJWTError as e:
         raise UnauthorizedError(detail=str(e))
 
-    return JWTRequestPayload(**decoded_token)
+    payload = JWTRequestPayload(**decoded_token)
+    verified_token_cache.put(session_token, payload)
+    return payload
+
+
+def verify_admin(
+    credentials: JWTRequestPayload = Depends(verify_token),
+) -> JWTRequestPayload:
+    """Доступ к служебным /internal/* только для ADMIN_USER_IDS."""
+    if credentials.sub not in app_config.jwt_config.admin_user_ids:
+        raise ForbiddenError()
+    return credentials
@@ -0,0 +1,183 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from uuid import UUID
+
+from src.interfaces.session_store import BaseSessionStore, SessionRecord
+from src.repositories.user_repository import UserRepository
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Колонка может оказаться TIMESTAMPTZ: сравниваем только наивное UTC-время
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class PostgresSessionStore(BaseSessionStore):
+    """Сессии в таблице "Session" - источник истины."""
+
+    def __init__(self, user_repo: UserRepository):
+        self.user_repo = user_repo
+
+    @staticmethod
+    def _record(row) -> SessionRecord:
+        return SessionRecord(
+            row["user_id"], row["session_token"], _naive_utc(row["expire_in"])
+        )
+
+    async def get(self, session_token: str) -> SessionRecord | None:
+        row = await self.user_repo.get_session(session_token)
+        return self._record(row) if row else None
+
+    async def get_by_user(self, user_id: UUID) -> SessionRecord | None:
+        row = await self.user_repo.get_session_by_user_id(user_id)
+        return self._record(row) if row else None
+
+    async def save(
+        self, session_id: UUID, record: SessionRecord, created_at: datetime
+    ) -> SessionRecord:
+        row = await self.user_repo.create_session(
+            _id=session_id,
+            user_id=record.user_id,
+            session_token=record.session_token,
+            created_at=created_at,
+            expire_in=record.expire_in,
+        )
+        return self._record(row)
+
+    async def delete(self, session_token: str) -> None:
+        await self.user_repo.delete_token(session_token=session_token)
+
+
+class LocalSessionStore(BaseSessionStore):
+    """Сессии в памяти процесса: для тестов и локального запуска без БД."""
+
+    def __init__(self):
+        self._by_token: dict[str, SessionRecord] = {}
+        self._by_user: dict[str, str] = {}
+
+    async def get(self, session_token: str) -> SessionRecord | None:
+        return self._by_token.get(session_token)
+
+    async def get_by_user(self, user_id: UUID) -> SessionRecord | None:
+        session_token = self._by_user.get(str(user_id))
+        return self._by_token.get(session_token) if session_token else None
+
+    async def save(
+        self, session_id: UUID, record: SessionRecord, created_at: datetime
+    ) -> SessionRecord:
+        current = await self.get_by_user(record.user_id)
+        if current and not current.is_expired(created_at):
+            return current
+
+        if current:
+            self._by_token.pop(current.session_token, None)
+        self._by_token[record.session_token] = record
+        self._by_user[str(record.user_id)] = record.session_token
+        return record
+
+    async def delete(self, session_token: str) -> None:
+        record = self._by_token.pop(session_token, None)
+        if record and self._by_user.get(str(record.user_id)) == session_token:
+            del self._by_user[str(record.user_id)]
+
+
+class CachedSessionStore(BaseSessionStore):
+    """
+    Ограниченный LRU в памяти перед основным хранилищем. Сессии, изменённые
+    другими процессами, видны не позже чем через ttl секунд.
+    """
+
+    MAX_ENTRIES = 10_000
+    TTL = 60
+
+    def __init__(
+        self,
+        backend: BaseSessionStore,
+        max_entries: int = MAX_ENTRIES,
+        ttl: float = TTL,
+    ):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._by_token: OrderedDict[str, tuple[float, SessionRecord]] = OrderedDict()
+        self._by_user: dict[str, str] = {}
+
+    def _lookup(self, session_token: str) -> SessionRecord | None:
+        item = self._by_token.get(session_token)
+        if item is None:
+            return None
+
+        cached_at, record = item
+        if time.monotonic() - cached_at > self.ttl or record.is_expired(_utcnow()):
+            self._forget(session_token)
+            return None
+
+        self._by_token.move_to_end(session_token)
+        return record
+
+    def _remember(self, record: SessionRecord) -> None:
+        previous = self._by_user.get(str(record.user_id))
+        if previous and previous != record.session_token:
+            self._by_token.pop(previous, None)
+
+        self._by_token[record.session_token] = (time.monotonic(), record)
+        self._by_token.move_to_end(record.session_token)
+        self._by_user[str(record.user_id)] = record.session_token
+        while len(self._by_token) > self.max_entries:
+            _, (_, evicted) = self._by_token.popitem(last=False)
+            if self._by_user.get(str(evicted.user_id)) == evicted.session_token:
+                del self._by_user[str(evicted.user_id)]
+
+    def _forget(self, session_token: str) -> None:
+        item = self._by_token.pop(session_token, None)
+        if item is not None:
+            user_id = str(item[1].user_id)
+            if self._by_user.get(user_id) == session_token:
+                del self._by_user[user_id]
+
+    async def get(self, session_token: str) -> SessionRecord | None:
+        record = self._lookup(session_token)
+        if record is not None:
+            self.hits += 1
+            return record
+
+        self.misses += 1
+        record = await self.backend.get(session_token)
+        if record is not None:
+            self._remember(record)
+        return record
+
+    async def get_by_user(self, user_id: UUID) -> SessionRecord | None:
+        session_token = self._by_user.get(str(user_id))
+        record = self._lookup(session_token) if session_token else None
+        if record is not None:
+            self.hits += 1
+            return record
+
+        self.misses += 1
+        record = await self.backend.get_by_user(user_id)
+        if record is not None:
+            self._remember(record)
+        return record
+
+    async def save(
+        self, session_id: UUID, record: SessionRecord, created_at: datetime
+    ) -> SessionRecord:
+        record = await self.backend.save(session_id, record, created_at)
+        self._remember(record)
+        return record
+
+    async def delete(self, session_token: str) -> None:
+        await self.backend.delete(session_token)
+        self._forget(session_token)
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._by_token), "hits": self.hits, "misses": self.misses}
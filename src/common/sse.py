@@ -0,0 +1,42 @@
+import json
+from typing import AsyncIterator
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from loguru import logger
+
+
+def format_sse(data: dict, event: str | None = None) -> str:
+    message = f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    if event:
+        message = f"event: {event}\n{message}"
+    return message
+
+
+async def _sse_events(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    # Комментарий сразу отправляет заголовки, не дожидаясь первого токена
+    yield ": stream opened\n\n"
+    # Заголовки уже отправлены, поэтому ошибку получает клиент отдельным событием
+    try:
+        async for token in tokens:
+            yield format_sse({"content": token})
+    except HTTPException as e:
+        yield format_sse({"detail": e.detail}, event="error")
+        return
+    except Exception:
+        logger.exception("SSE stream failed")
+        yield format_sse({"detail": "Internal Server Error"}, event="error")
+        return
+    yield format_sse({}, event="done")
+
+
+def sse_response(tokens: AsyncIterator[str]) -> StreamingResponse:
+    """
+    Server-Sent Events из потока текстовых фрагментов.
+    При отключении клиента Starlette отменяет генератор, и запрос к провайдеру закрывается.
+    """
+    return StreamingResponse(
+        _sse_events(tokens),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
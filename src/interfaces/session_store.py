@@ -0,0 +1,40 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from uuid import UUID
+
+
+class SessionRecord:
+    __slots__ = ("user_id", "session_token", "expire_in")
+
+    def __init__(self, user_id: UUID, session_token: str, expire_in: datetime):
+        self.user_id = user_id
+        self.session_token = session_token
+        # Наивное время в UTC, как в таблице "Session"
+        self.expire_in = expire_in
+
+    def is_expired(self, now: datetime) -> bool:
+        return self.expire_in <= now
+
+
+class BaseSessionStore(ABC):
+    @abstractmethod
+    async def get(self, session_token: str) -> SessionRecord | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_by_user(self, user_id: UUID) -> SessionRecord | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def save(
+        self, session_id: UUID, record: SessionRecord, created_at: datetime
+    ) -> SessionRecord:
+        """
+        Сохранить сессию пользователя. Если его текущая сессия ещё действует,
+        она остаётся и возвращается вместо переданной.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, session_token: str) -> None:
+        raise NotImplementedError
@@ -0,0 +1,55 @@
+from datetime import date
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class MoodInput(BaseModel):
+    mood_type_id: UUID = Field(...)
+    activity_type_id: UUID = Field(...)
+    time_start: str | None = Field(default=None)
+    time_end: str | None = Field(default=None)
+    target_date: date = Field(...)
+
+
+class CalendarEntry(BaseModel):
+    id: UUID
+    date: date
+    mood_type_id: UUID | None = None
+    user_id: UUID
+
+
+class Mood(BaseModel):
+    id: UUID
+    mood_type_id: UUID | None = None
+    activity_type_id: UUID | None = None
+    time_start: str | None = None
+    time_end: str | None = None
+    calendar_id: UUID
+
+
+class MoodWithDate(Mood):
+    date: date
+
+
+class CalendarEntriesPage(BaseModel):
+    entries: list[CalendarEntry]
+    next_cursor: str | None = None
+
+
+class MoodsPage(BaseModel):
+    moods: list[Mood]
+    next_cursor: str | None = None
+
+
+class MoodsWithDatePage(BaseModel):
+    moods: list[MoodWithDate]
+    next_cursor: str | None = None
+
+
+class MoodsResponse(BaseModel):
+    moods: list[MoodWithDate]
+
+
+class MoodResponse(BaseModel):
+    mood: Mood
@@ -1,14 +1,127 @@
 from uuid import UUID
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Any, List, Optional
 
-from src.common.database.postgres import Postgres
+from src.common.database.postgres import Postgres, read_only, writes
+
+# Время суток по строке "HH:MM"; некорректное или пустое время -> NULL
+TIME_OF_DAY_SQL = r"""CASE
+    WHEN {column} IS NULL OR {column} !~ '^([01]?\d|2[0-3]):[0-5]\d$' THEN NULL
+    WHEN {column}::time < '12:00' THEN 'morning'
+    WHEN {column}::time < '17:00' THEN 'afternoon'
+    WHEN {column}::time < '22:00' THEN 'evening'
+    ELSE 'night'
+END"""
+
+# Дельта дневной сводки для строк настроений из CTE "mood"
+MOOD_ROLLUP_DELTA_SQL = """
+    SELECT
+        c.user_id,
+        c.date,
+        COALESCE(m.mood_type_id::text, 'None') AS mood_type_key,
+        COALESCE(m.activity_type_id::text, 'None') AS activity_type_key,
+        CASE WHEN b.bucket = 'morning' THEN 1 ELSE 0 END AS morning,
+        CASE WHEN b.bucket = 'afternoon' THEN 1 ELSE 0 END AS afternoon,
+        CASE WHEN b.bucket = 'evening' THEN 1 ELSE 0 END AS evening,
+        CASE WHEN b.bucket = 'night' THEN 1 ELSE 0 END AS night
+    FROM mood AS m
+    JOIN "Calendar" AS c ON c.id = m.calendar_id
+    CROSS JOIN LATERAL (
+        SELECT {time_of_day} AS bucket
+    ) AS b
+""".format(time_of_day=TIME_OF_DAY_SQL.format(column="m.time_start"))
+
+# Сумма счётчиков {column} текущей строки сводки и EXCLUDED по каждому ключу
+MERGE_COUNTS_SQL = """(
+    SELECT jsonb_object_agg(key, amount)
+    FROM (
+        SELECT key, SUM(value::int) AS amount
+        FROM (
+            SELECT * FROM jsonb_each_text("MoodDailyRollup".{column})
+            UNION ALL
+            SELECT * FROM jsonb_each_text(EXCLUDED.{column})
+        ) AS counts
+        GROUP BY key
+    ) AS merged
+)"""
+
+# Дневная сводка, заново посчитанная по "Mood" для дней из условия {condition}
+MOOD_ROLLUP_SQL = """
+    WITH moods AS (
+        SELECT
+            c.user_id,
+            c.date,
+            COALESCE(m.mood_type_id::text, 'None') AS mood_type_key,
+            COALESCE(m.activity_type_id::text, 'None') AS activity_type_key,
+            {time_of_day} AS bucket
+        FROM "Mood" AS m
+        JOIN "Calendar" AS c ON c.id = m.calendar_id
+        WHERE {{condition}}
+    ),
+    days AS (
+        SELECT
+            user_id,
+            date,
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE bucket = 'morning') AS morning,
+            COUNT(*) FILTER (WHERE bucket = 'afternoon') AS afternoon,
+            COUNT(*) FILTER (WHERE bucket = 'evening') AS evening,
+            COUNT(*) FILTER (WHERE bucket = 'night') AS night
+        FROM moods
+        GROUP BY user_id, date
+    ),
+    mood_types AS (
+        SELECT user_id, date, jsonb_object_agg(mood_type_key, amount) AS counts
+        FROM (
+            SELECT user_id, date, mood_type_key, COUNT(*) AS amount
+            FROM moods
+            GROUP BY user_id, date, mood_type_key
+        ) AS grouped
+        GROUP BY user_id, date
+    ),
+    activity_types AS (
+        SELECT user_id, date, jsonb_object_agg(activity_type_key, amount) AS counts
+        FROM (
+            SELECT user_id, date, activity_type_key, COUNT(*) AS amount
+            FROM moods
+            GROUP BY user_id, date, activity_type_key
+        ) AS grouped
+        GROUP BY user_id, date
+    )
+    INSERT INTO "MoodDailyRollup" (
+        user_id, date, total, morning, afternoon, evening, night,
+        mood_type_counts, activity_type_counts
+    )
+    SELECT
+        d.user_id, d.date, d.total, d.morning, d.afternoon, d.evening, d.night,
+        mt.counts, at.counts
+    FROM days AS d
+    JOIN mood_types AS mt USING (user_id, date)
+    JOIN activity_types AS at USING (user_id, date)
+""".format(time_of_day=TIME_OF_DAY_SQL.format(column="m.time_start"))
+
+# Увеличение версии данных пользователей из CTE {source} (колонка user_id)
+BUMP_DATA_VERSION_SQL = """
+    INSERT INTO "UserDataVersion" AS v (user_id, version)
+    SELECT DISTINCT user_id, 1 FROM {source}
+    ON CONFLICT (user_id) DO UPDATE SET version = v.version + 1
+"""
+
+MOOD_COLUMNS = (
+    "id",
+    "mood_type_id",
+    "activity_type_id",
+    "time_start",
+    "time_end",
+    "calendar_id",
+)
 
 
 class CalendarRepository:
     def __init__(self, conn: Postgres):
         self._conn = conn
 
+    @writes()
     async def create_calendar_entry(
         self,
         _id: UUID,
@@ -16,40 +129,68 @@ class CalendarRepository:
         user_id: UUID,
         mood_type_id: UUID = None,
     ):
-        query = """
-            INSERT INTO "Calendar" (id, date, mood_type_id, user_id)
-            VALUES ($1, $2, $3, $4)
-            ON CONFLICT (date) DO NOTHING
-            RETURNING *
+        query = f"""
+            WITH entry AS (
+                INSERT INTO "Calendar" (id, date, mood_type_id, user_id)
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (user_id, date) DO NOTHING
+                RETURNING *
+            ),
+            version AS ({BUMP_DATA_VERSION_SQL.format(source="entry")})
+            SELECT * FROM entry
         """
-        return await self._conn.pool.fetchrow(query, _id, date, mood_type_id, user_id)
+        return await self._conn.fetchrow(
+            "calendar.create_calendar_entry", query, _id, date, mood_type_id, user_id
+        )
 
     async def get_calendar(self, _id: UUID):
         query = 'SELECT * FROM "Calendar" WHERE id = $1'
-        return await self._conn.pool.fetchrow(query, _id)
+        return await self._conn.fetchrow("calendar.get_calendar", query, _id)
 
+    async def get_calendar_by_date(self, user_id: UUID, date: date):
+        # Читается с основной БД: результат сразу используется для записи
+        query = 'SELECT * FROM "Calendar" WHERE user_id = $1 AND date = $2'
+        return await self._conn.fetchrow(
+            "calendar.get_calendar_by_date", query, user_id, date
+        )
+
+    @read_only()
     async def get_user_calendar_entries(
         self,
         user_id: UUID,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
+        after: Optional[tuple[date, UUID]] = None,
+        limit: Optional[int] = None,
     ):
-        query = 'SELECT * FROM "Calendar" WHERE user_id = $1'
-        params = [user_id]
-
-        if start_date and end_date:
-            query += " AND date BETWEEN $2 AND $3"
-            params.extend([start_date, end_date])
-        elif start_date:
-            query += " AND date >= $2"
+        # Свой именованный запрос на каждый вариант фильтра и курсора
+        name = "calendar.get_user_calendar_entries"
+        conditions = ["user_id = $1"]
+        params: list[Any] = [user_id]
+        if start_date:
+            name += "_from"
             params.append(start_date)
-        elif end_date:
-            query += " AND date <= $2"
+            conditions.append(f"date >= ${len(params)}")
+        if end_date:
+            name += "_to"
             params.append(end_date)
+            conditions.append(f"date <= ${len(params)}")
+        if after:
+            # Keyset: строки строго после последней строки предыдущей страницы
+            name += "_after"
+            params.extend(after)
+            conditions.append(f"(date, id) < (${len(params) - 1}, ${len(params)})")
+        params.append(limit)
 
-        query += " ORDER BY date DESC"
-        return await self._conn.pool.fetch(query, *params)
+        query = f"""
+            SELECT * FROM "Calendar"
+            WHERE {" AND ".join(conditions)}
+            ORDER BY date DESC, id DESC
+            LIMIT ${len(params)}
+        """
+        return await self._conn.fetch(name, query, *params)
 
+    @writes()
     async def create_mood(
         self,
         _id: UUID,
@@ -58,13 +199,50 @@ class CalendarRepository:
         time_start: Optional[str],
         time_end: Optional[str],
         calendar_id: UUID,
+        user_id: Optional[UUID] = None,
     ):
-        query = """
-            INSERT INTO "Mood" (id, mood_type_id, activity_type_id, time_start, time_end, calendar_id)
-            VALUES ($1, $2, $3, $4, $5, $6)
-            RETURNING *
+        # Вставка настроения и обновление дневной сводки одним выражением
+        query = f"""
+            WITH mood AS (
+                INSERT INTO "Mood" (id, mood_type_id, activity_type_id, time_start, time_end, calendar_id)
+                VALUES ($1, $2, $3, $4, $5, $6)
+                RETURNING *
+            ),
+            delta AS ({MOOD_ROLLUP_DELTA_SQL}),
+            rollup AS (
+                INSERT INTO "MoodDailyRollup" AS r (
+                    user_id, date, total, morning, afternoon, evening, night,
+                    mood_type_counts, activity_type_counts
+                )
+                SELECT
+                    d.user_id, d.date, 1, d.morning, d.afternoon, d.evening, d.night,
+                    jsonb_build_object(d.mood_type_key, 1),
+                    jsonb_build_object(d.activity_type_key, 1)
+                FROM delta AS d
+                ON CONFLICT (user_id, date) DO UPDATE SET
+                    total = r.total + 1,
+                    morning = r.morning + EXCLUDED.morning,
+                    afternoon = r.afternoon + EXCLUDED.afternoon,
+                    evening = r.evening + EXCLUDED.evening,
+                    night = r.night + EXCLUDED.night,
+                    mood_type_counts = r.mood_type_counts || (
+                        SELECT jsonb_object_agg(
+                            e.key, COALESCE((r.mood_type_counts ->> e.key)::int, 0) + 1
+                        )
+                        FROM jsonb_each(EXCLUDED.mood_type_counts) AS e
+                    ),
+                    activity_type_counts = r.activity_type_counts || (
+                        SELECT jsonb_object_agg(
+                            e.key, COALESCE((r.activity_type_counts ->> e.key)::int, 0) + 1
+                        )
+                        FROM jsonb_each(EXCLUDED.activity_type_counts) AS e
+                    )
+            ),
+            version AS ({BUMP_DATA_VERSION_SQL.format(source="delta")})
+            SELECT * FROM mood
         """
-        return await self._conn.pool.fetchrow(
+        return await self._conn.fetchrow(
+            "calendar.create_mood",
             query,
             _id,
             mood_type_id,
@@ -76,24 +254,365 @@ class CalendarRepository:
 
     async def get_mood(self, mood_id: UUID):
         query = 'SELECT * FROM "Mood" WHERE id = $1'
-        return await self._conn.pool.fetchrow(query, mood_id)
+        return await self._conn.fetchrow("calendar.get_mood", query, mood_id)
+
+    async def get_moods_by_calendar(
+        self,
+        calendar_id: UUID,
+        after: Optional[tuple[str, UUID]] = None,
+        limit: Optional[int] = None,
+    ):
+        if after:
+            name = "calendar.get_moods_by_calendar_after"
+            condition = "(COALESCE(time_start, '00:00'), id) > ($3, $4)"
+            params = [calendar_id, limit, *after]
+        else:
+            name = "calendar.get_moods_by_calendar"
+            condition = "TRUE"
+            params = [calendar_id, limit]
+
+        query = f"""
+            SELECT * FROM "Mood"
+            WHERE calendar_id = $1 AND {condition}
+            ORDER BY COALESCE(time_start, '00:00'), id
+            LIMIT $2
+        """
+        return await self._conn.fetch(name, query, *params)
+
+    @read_only()
+    async def get_moods_by_period(
+        self,
+        user_id: UUID,
+        start_date: datetime,
+        end_date: datetime,
+        after: Optional[tuple[date, str, UUID]] = None,
+        limit: Optional[int] = None,
+    ):
+        if after:
+            name = "calendar.get_moods_by_period_after"
+            condition = "(c.date, COALESCE(m.time_start, '00:00'), m.id) > ($5, $6, $7)"
+            params = [user_id, start_date, end_date, limit, *after]
+        else:
+            name = "calendar.get_moods_by_period"
+            condition = "TRUE"
+            params = [user_id, start_date, end_date, limit]
 
-    async def get_moods_by_calendar(self, calendar_id: UUID):
-        query = 'SELECT * FROM "Mood" WHERE calendar_id = $1 ORDER BY time_start'
-        return await self._conn.pool.fetch(query, calendar_id)
+        query = f"""
+            SELECT m.*, c.date
+            FROM "Mood" AS m
+            JOIN "Calendar" AS c ON c.id = m.calendar_id
+            WHERE c.user_id = $1 AND c.date BETWEEN $2 AND $3 AND {condition}
+            ORDER BY c.date, COALESCE(m.time_start, '00:00'), m.id
+            LIMIT $4
+        """
+        return await self._conn.fetch(name, query, *params)
+
+    async def get_month_view(self, user_id: UUID, start_date: date, end_date: date):
+        """
+        Записи календаря и настроения за период для кеша CalendarService.
+        Всегда с основной БД и одним снимком: кеш живёт дольше окна
+        read-your-writes, и отстающая реплика закрепила бы в нём старые данные.
+        """
+        entries_query = """
+            SELECT * FROM "Calendar"
+            WHERE user_id = $1 AND date BETWEEN $2 AND $3
+        """
+        moods_query = """
+            SELECT m.*, c.date
+            FROM "Mood" AS m
+            JOIN "Calendar" AS c ON c.id = m.calendar_id
+            WHERE c.user_id = $1 AND c.date BETWEEN $2 AND $3
+        """
+        params = (user_id, start_date, end_date)
+        async with self._conn.acquire() as connection:
+            async with connection.transaction(
+                isolation="repeatable_read", readonly=True
+            ):
+                entries = await self._conn.fetch(
+                    "calendar.get_month_entries",
+                    entries_query,
+                    *params,
+                    connection=connection,
+                )
+                moods = await self._conn.fetch(
+                    "calendar.get_month_moods",
+                    moods_query,
+                    *params,
+                    connection=connection,
+                )
+        return entries, moods
+
+    @read_only()
+    def iter_mood_history(self, user_id: UUID, idle_timeout: float | None = None):
+        # Дни без настроений тоже попадают в выгрузку (mood_id = NULL)
+        query = """
+            SELECT
+                c.date,
+                c.id AS calendar_id,
+                m.id AS mood_id,
+                m.mood_type_id,
+                m.activity_type_id,
+                m.time_start,
+                m.time_end
+            FROM "Calendar" AS c
+            LEFT JOIN "Mood" AS m ON m.calendar_id = c.id
+            WHERE c.user_id = $1
+            ORDER BY c.date, COALESCE(m.time_start, '00:00')
+        """
+        return self._conn.iterate(
+            "calendar.iter_mood_history", query, user_id, idle_timeout=idle_timeout
+        )
+
+    @read_only()
+    async def get_moods_for_report(
+        self,
+        user_id: UUID,
+        start_date: datetime,
+        end_date: datetime,
+    ):
+        query = """
+            SELECT c.date, m.time_start, m.time_end, mt.name AS mood_type, at.name AS activity_type
+            FROM "Mood" AS m
+            JOIN "Calendar" AS c ON c.id = m.calendar_id
+            LEFT JOIN "MoodType" AS mt ON mt.id = m.mood_type_id
+            LEFT JOIN "ActivityType" AS at ON at.id = m.activity_type_id
+            WHERE c.user_id = $1 AND c.date BETWEEN $2 AND $3
+            ORDER BY c.date, COALESCE(m.time_start, '00:00')
+        """
+        return await self._conn.fetch(
+            "calendar.get_moods_for_report", query, user_id, start_date, end_date
+        )
+
+    @read_only()
+    async def get_mood_columns(
+        self,
+        user_id: UUID,
+        start_date: datetime,
+        end_date: datetime,
+    ):
+        # Одна строка с массивами по колонкам вместо записи на каждое настроение
+        query = r"""
+            WITH moods AS (
+                SELECT
+                    m.id,
+                    c.date - DATE '0001-01-01' + 1 AS day,
+                    CASE WHEN m.time_start ~ '^([01]?\d|2[0-3]):[0-5]\d$'
+                        THEN (EXTRACT(EPOCH FROM m.time_start::time) / 60)::int
+                        ELSE -1
+                    END AS minute,
+                    m.mood_type_id,
+                    m.activity_type_id
+                FROM "Mood" AS m
+                JOIN "Calendar" AS c ON c.id = m.calendar_id
+                WHERE c.user_id = $1 AND c.date BETWEEN $2 AND $3
+            )
+            SELECT
+                COALESCE(array_agg(day ORDER BY day, id), '{}') AS days,
+                COALESCE(array_agg(minute ORDER BY day, id), '{}') AS minutes,
+                COALESCE(array_agg(mood_type_id ORDER BY day, id), '{}') AS mood_type_ids,
+                COALESCE(
+                    array_agg(activity_type_id ORDER BY day, id), '{}'
+                ) AS activity_type_ids
+            FROM moods
+        """
+        return await self._conn.fetchrow(
+            "calendar.get_mood_columns", query, user_id, start_date, end_date
+        )
+
+    @read_only()
+    async def get_mood_statistics(
+        self,
+        user_id: UUID,
+        start_date: datetime,
+        end_date: datetime,
+    ):
+        # Статистика читается из дневной сводки: не более одной строки на день
+        query = """
+            WITH days AS (
+                SELECT * FROM "MoodDailyRollup"
+                WHERE user_id = $1 AND date BETWEEN $2 AND $3
+            )
+            SELECT 'total' AS kind, NULL::text AS key, COALESCE(SUM(total), 0) AS total FROM days
+            UNION ALL
+            SELECT 'time', 'morning', COALESCE(SUM(morning), 0) FROM days
+            UNION ALL
+            SELECT 'time', 'afternoon', COALESCE(SUM(afternoon), 0) FROM days
+            UNION ALL
+            SELECT 'time', 'evening', COALESCE(SUM(evening), 0) FROM days
+            UNION ALL
+            SELECT 'time', 'night', COALESCE(SUM(night), 0) FROM days
+            UNION ALL
+            SELECT 'mood_type', counts.key, SUM(counts.value::int)
+            FROM days, jsonb_each_text(days.mood_type_counts) AS counts
+            GROUP BY counts.key
+            HAVING SUM(counts.value::int) > 0
+            UNION ALL
+            SELECT 'activity_type', counts.key, SUM(counts.value::int)
+            FROM days, jsonb_each_text(days.activity_type_counts) AS counts
+            GROUP BY counts.key
+            HAVING SUM(counts.value::int) > 0
+        """
+        return await self._conn.fetch(
+            "calendar.get_mood_statistics", query, user_id, start_date, end_date
+        )
+
+    @writes()
+    async def delete_mood(self, mood_id: UUID, user_id: UUID):
+        # Удаление настроения владельца и уменьшение дневной сводки одним выражением
+        query = f"""
+            WITH mood AS (
+                DELETE FROM "Mood" AS m USING "Calendar" AS c
+                WHERE m.id = $1 AND c.id = m.calendar_id AND c.user_id = $2
+                RETURNING m.*
+            ),
+            delta AS ({MOOD_ROLLUP_DELTA_SQL}),
+            rollup AS (
+                UPDATE "MoodDailyRollup" AS r SET
+                    total = r.total - 1,
+                    morning = r.morning - d.morning,
+                    afternoon = r.afternoon - d.afternoon,
+                    evening = r.evening - d.evening,
+                    night = r.night - d.night,
+                    mood_type_counts = r.mood_type_counts || jsonb_build_object(
+                        d.mood_type_key,
+                        COALESCE((r.mood_type_counts ->> d.mood_type_key)::int, 0) - 1
+                    ),
+                    activity_type_counts = r.activity_type_counts || jsonb_build_object(
+                        d.activity_type_key,
+                        COALESCE((r.activity_type_counts ->> d.activity_type_key)::int, 0) - 1
+                    )
+                FROM delta AS d
+                WHERE r.user_id = d.user_id AND r.date = d.date
+            ),
+            version AS ({BUMP_DATA_VERSION_SQL.format(source="delta")})
+            SELECT m.*, d.date, d.user_id FROM mood AS m CROSS JOIN delta AS d
+        """
+        return await self._conn.fetchrow(
+            "calendar.delete_mood", query, mood_id, user_id
+        )
+
+    async def rebuild_mood_rollup(self):
+        """
+        Полностью пересобрать дневную сводку настроений по таблице "Mood"
+        """
+        query = MOOD_ROLLUP_SQL.format(condition="TRUE")
+        async with self._conn.acquire() as connection:
+            async with connection.transaction():
+                # Блокируем сводку, чтобы параллельные записи дождались пересборки
+                await connection.execute(
+                    'LOCK TABLE "MoodDailyRollup" IN EXCLUSIVE MODE'
+                )
+                await connection.execute('DELETE FROM "MoodDailyRollup"')
+                return await connection.execute(query)
+
+    @writes()
+    async def bulk_create_moods(
+        self,
+        user_id: UUID,
+        days: dict[date, UUID],
+        moods: list[tuple[UUID, UUID, UUID, Optional[str], Optional[str], date]],
+    ) -> dict[date, UUID]:
+        """
+        Пакетная вставка настроений в одной транзакции: дни календаря находятся
+        или создаются одним запросом (days — id для новых дней), строки "Mood"
+        загружаются через COPY, затем их счётчики прибавляются к дневной сводке.
+        Возвращает id календаря для каждой найденной даты; настроения на даты,
+        которые не удалось получить, пропускаются.
+        """
+        resolve_query = """
+            WITH wanted AS (
+                SELECT * FROM unnest($2::uuid[], $3::date[]) AS w(id, date)
+            ),
+            created AS (
+                INSERT INTO "Calendar" (id, date, user_id)
+                SELECT w.id, w.date, $1 FROM wanted AS w
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM "Calendar" AS c
+                    WHERE c.user_id = $1 AND c.date = w.date
+                )
+                ON CONFLICT DO NOTHING
+                RETURNING id, date
+            )
+            SELECT id, date FROM created
+            UNION ALL
+            SELECT c.id, c.date
+            FROM "Calendar" AS c
+            JOIN wanted AS w ON w.date = c.date
+            WHERE c.user_id = $1
+        """
+        # Сводка по одним только вставленным настроениям прибавляется к текущей:
+        # параллельные create_mood / delete_mood меняют её своими приращениями,
+        # и пересчёт дня целиком мог бы их затереть
+        rollup_query = (
+            MOOD_ROLLUP_SQL.format(condition="m.id = ANY($1::uuid[])")
+            + """
+            ON CONFLICT (user_id, date) DO UPDATE SET
+                total = "MoodDailyRollup".total + EXCLUDED.total,
+                morning = "MoodDailyRollup".morning + EXCLUDED.morning,
+                afternoon = "MoodDailyRollup".afternoon + EXCLUDED.afternoon,
+                evening = "MoodDailyRollup".evening + EXCLUDED.evening,
+                night = "MoodDailyRollup".night + EXCLUDED.night,
+                mood_type_counts = {mood_type_counts},
+                activity_type_counts = {activity_type_counts}
+        """.format(
+                mood_type_counts=MERGE_COUNTS_SQL.format(column="mood_type_counts"),
+                activity_type_counts=MERGE_COUNTS_SQL.format(
+                    column="activity_type_counts"
+                ),
+            )
+        )
+        async with self._conn.acquire() as connection:
+            async with connection.transaction():
+                rows = await self._conn.fetch(
+                    "calendar.resolve_calendar_days",
+                    resolve_query,
+                    user_id,
+                    list(days.values()),
+                    list(days.keys()),
+                    connection=connection,
+                )
+                calendar_ids = {row["date"]: row["id"] for row in rows}
+                records = [
+                    (*mood[:-1], calendar_ids[mood[-1]])
+                    for mood in moods
+                    if mood[-1] in calendar_ids
+                ]
+                await self.bump_data_version(user_id, connection=connection)
+                if records:
+                    await connection.copy_records_to_table(
+                        "Mood", records=records, columns=MOOD_COLUMNS
+                    )
+                    await self._conn.execute(
+                        "calendar.add_mood_rollup",
+                        rollup_query,
+                        [record[0] for record in records],
+                        connection=connection,
+                    )
+        return calendar_ids
+
+    async def bump_data_version(self, user_id: UUID, connection=None):
+        query = BUMP_DATA_VERSION_SQL.format(source="(SELECT $1::uuid AS user_id) AS u")
+        return await self._conn.execute(
+            "calendar.bump_data_version", query, user_id, connection=connection
+        )
 
-    async def delete_mood(self, mood_id: UUID):
-        query = 'DELETE FROM "Mood" WHERE id = $1 RETURNING *'
-        return await self._conn.pool.fetchrow(query, mood_id)
+    async def get_data_version(self, user_id: UUID) -> int:
+        # Всегда с основной БД: реплика может отставать от данных, по которым
+        # строится ответ, и тогда ETag не изменится вслед за ними
+        query = 'SELECT version FROM "UserDataVersion" WHERE user_id = $1'
+        row = await self._conn.fetchrow("calendar.get_data_version", query, user_id)
+        return row["version"] if row else 0
 
+    @read_only(user_arg=None)
     async def get_all_moot_types(self):
         query = """
             SELECT * FROM "MoodType"
         """
-        return await self._conn.pool.fetch(query)
+        return await self._conn.fetch("calendar.get_all_moot_types", query)
 
+    @read_only(user_arg=None)
     async def get_all_activity_types(self):
         query = """
             SELECT * FROM "ActivityType"
         """
-        return await self._conn.pool.fetch(query)
+        return await self._conn.fetch("calendar.get_all_activity_types", query)
@@ -0,0 +1,96 @@
+from uuid import UUID
+from datetime import date
+
+from src.common.database.postgres import Postgres
+
+
+class ReportJobRepository:
+    def __init__(self, conn: Postgres):
+        self._conn = conn
+
+    async def create_job(
+        self, _id: UUID, user_id: UUID, start_date: date, end_date: date
+    ):
+        query = """
+            INSERT INTO "ReportJob" (id, user_id, start_date, end_date)
+            VALUES ($1, $2, $3, $4)
+            RETURNING id, status, created_at
+        """
+        return await self._conn.fetchrow(
+            "report_job.create_job", query, _id, user_id, start_date, end_date
+        )
+
+    async def get_job(self, job_id: UUID, user_id: UUID):
+        query = """
+            SELECT * FROM "ReportJob"
+            WHERE id = $1 AND user_id = $2
+        """
+        return await self._conn.fetchrow("report_job.get_job", query, job_id, user_id)
+
+    async def claim_job(self, lease_seconds: float):
+        # Берём ожидающую задачу или задачу, чей воркер не продлил аренду (упал/перезапущен)
+        query = """
+            UPDATE "ReportJob" SET
+                status = 'running',
+                attempts = attempts + 1,
+                started_at = now(),
+                locked_until = now() + make_interval(secs => $1)
+            WHERE id = (
+                SELECT id FROM "ReportJob"
+                WHERE status = 'pending'
+                    OR (status = 'running' AND locked_until < now())
+                ORDER BY created_at
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING *
+        """
+        return await self._conn.fetchrow("report_job.claim_job", query, lease_seconds)
+
+    # attempts задачи - номер её захвата: воркер меняет задачу, только пока
+    # номер совпадает с его захватом, иначе задачу уже перехватил другой воркер
+
+    async def extend_lease(
+        self, job_id: UUID, attempt: int, lease_seconds: float
+    ) -> bool:
+        query = """
+            UPDATE "ReportJob"
+            SET locked_until = now() + make_interval(secs => $3)
+            WHERE id = $1 AND attempts = $2 AND status = 'running'
+        """
+        status = await self._conn.execute(
+            "report_job.extend_lease", query, job_id, attempt, lease_seconds
+        )
+        return status == "UPDATE 1"
+
+    async def complete_job(self, job_id: UUID, attempt: int, result: str) -> bool:
+        query = """
+            UPDATE "ReportJob" SET
+                status = 'done',
+                result = $3,
+                error = NULL,
+                finished_at = now(),
+                locked_until = NULL
+            WHERE id = $1 AND attempts = $2 AND status = 'running'
+        """
+        status = await self._conn.execute(
+            "report_job.complete_job", query, job_id, attempt, result
+        )
+        return status == "UPDATE 1"
+
+    async def fail_job(
+        self, job_id: UUID, attempt: int, error: str, max_attempts: int
+    ) -> bool:
+        # Пока попытки не исчерпаны, задача возвращается в очередь
+        query = """
+            UPDATE "ReportJob" SET
+                status = CASE WHEN attempts >= $4 THEN 'failed' ELSE 'pending' END,
+                error = $3,
+                finished_at = CASE WHEN attempts >= $4 THEN now() END,
+                locked_until = NULL
+            WHERE id = $1 AND attempts = $2 AND status = 'running'
+        """
+        status = await self._conn.execute(
+            "report_job.fail_job", query, job_id, attempt, error, max_attempts
+        )
+        return status == "UPDATE 1"
@@ -15,24 +15,37 @@ class TodoCalendarRepository:
             VALUES ($1, $2, $3)
             RETURNING *
         """
-        return await self._conn.pool.fetchrow(query, _id, date, user_id)
+        return await self._conn.fetchrow(
+            "todo_calendar.create_todo_calendar", query, _id, date, user_id
+        )
 
     async def get_todo_calendar(self, calendar_id: UUID):
         query = 'SELECT * FROM "ToDoCalendar" WHERE id = $1'
-        return await self._conn.pool.fetchrow(query, calendar_id)
+        return await self._conn.fetchrow(
+            "todo_calendar.get_todo_calendar", query, calendar_id
+        )
 
     async def get_user_todo_calendars(
         self, user_id: UUID, date: Optional[datetime] = None
     ):
-        query = 'SELECT * FROM "ToDoCalendar" WHERE user_id = $1'
-        params = [user_id]
-
         if date:
-            query += " AND date = $2"
-            params.append(date)
+            query = """
+                SELECT * FROM "ToDoCalendar"
+                WHERE user_id = $1 AND date = $2
+                ORDER BY date DESC
+            """
+            return await self._conn.fetch(
+                "todo_calendar.get_user_todo_calendars_by_date", query, user_id, date
+            )
 
-        query += " ORDER BY date DESC"
-        return await self._conn.pool.fetch(query, *params)
+        query = """
+            SELECT * FROM "ToDoCalendar"
+            WHERE user_id = $1
+            ORDER BY date DESC
+        """
+        return await self._conn.fetch(
+            "todo_calendar.get_user_todo_calendars", query, user_id
+        )
 
     async def update_todo_calendar(
         self, calendar_id: UUID, date: Optional[datetime] = None
@@ -46,11 +59,15 @@ class TodoCalendarRepository:
             WHERE id = $1 
             RETURNING *
         """
-        return await self._conn.pool.fetchrow(query, calendar_id, date)
+        return await self._conn.fetchrow(
+            "todo_calendar.update_todo_calendar", query, calendar_id, date
+        )
 
     async def delete_todo_calendar(self, calendar_id: UUID):
         query = 'DELETE FROM "ToDoCalendar" WHERE id = $1 RETURNING *'
-        return await self._conn.pool.fetchrow(query, calendar_id)
+        return await self._conn.fetchrow(
+            "todo_calendar.delete_todo_calendar", query, calendar_id
+        )
 
     async def create_todo_mood(
         self,
@@ -68,7 +85,8 @@ class TodoCalendarRepository:
             VALUES ($1, $2, $3, $4, $5, $6, $7)
             RETURNING *
         """
-        return await self._conn.pool.fetchrow(
+        return await self._conn.fetchrow(
+            "todo_calendar.create_todo_mood",
             query,
             _id,
             advice,
@@ -81,7 +99,9 @@ class TodoCalendarRepository:
 
     async def get_todo_mood(self, todo_mood_id: UUID):
         query = 'SELECT * FROM "ToDoMood" WHERE id = $1'
-        return await self._conn.pool.fetchrow(query, todo_mood_id)
+        return await self._conn.fetchrow(
+            "todo_calendar.get_todo_mood", query, todo_mood_id
+        )
 
     async def get_todo_moods_by_calendar(self, todo_calendar_id: UUID):
         query = """
@@ -89,7 +109,9 @@ class TodoCalendarRepository:
             WHERE todo_calendar_id = $1 
             ORDER BY time_start
         """
-        return await self._conn.pool.fetch(query, todo_calendar_id)
+        return await self._conn.fetch(
+            "todo_calendar.get_todo_moods_by_calendar", query, todo_calendar_id
+        )
 
     async def toggle_todo_mood_checkbox(self, todo_mood_id: UUID):
         query = """
@@ -98,8 +120,12 @@ class TodoCalendarRepository:
             WHERE id = $1 
             RETURNING *
         """
-        return await self._conn.pool.fetchrow(query, todo_mood_id)
+        return await self._conn.fetchrow(
+            "todo_calendar.toggle_todo_mood_checkbox", query, todo_mood_id
+        )
 
     async def delete_todo_mood(self, todo_mood_id: UUID):
         query = 'DELETE FROM "ToDoMood" WHERE id = $1 RETURNING *'
-        return await self._conn.pool.fetchrow(query, todo_mood_id)
+        return await self._conn.fetchrow(
+            "todo_calendar.delete_todo_mood", query, todo_mood_id
+        )
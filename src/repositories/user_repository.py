@@ -15,7 +15,7 @@ class UserRepository:
             SELECT u.id, u.first_name, u.second_name, u.email, u.test_id, u.created_at  FROM "User" as u
             WHERE id = $1
         """
-        return await self._conn.pool.fetchrow(query, _id)
+        return await self._conn.fetchrow("user.get_user_data_by_id", query, _id)
 
     async def update_user_test(self, user_id: UUID, onboarding_test_id: UUID):
         query = """
@@ -24,19 +24,62 @@ class UserRepository:
             WHERE id = $2
             RETURNING *
         """
-        return await self._conn.pool.execute(query, onboarding_test_id, user_id)
+        return await self._conn.execute(
+            "user.update_user_test", query, onboarding_test_id, user_id
+        )
 
     async def create_onboarding_test(
-        self, _id: UUID, result: str, personality_type: str, user_id: UUID
+        self,
+        _id: UUID,
+        result: str,
+        personality_type: str,
+        user_id: UUID,
+        responses: str | None = None,
+    ):
+        query = """
+            INSERT INTO "OnboardingTestResult" (id, result, personality_type, user_id, responses)
+            values ($1, $2, $3, $4, $5)
+        """
+        return await self._conn.execute(
+            "user.create_onboarding_test",
+            query,
+            _id,
+            result,
+            personality_type,
+            user_id,
+            responses,
+        )
+
+    def iter_onboarding_responses(self):
+        query = """
+            SELECT id, responses FROM "OnboardingTestResult"
+            WHERE responses IS NOT NULL
+        """
+        return self._conn.iterate("user.iter_onboarding_responses", query)
+
+    async def update_onboarding_results(
+        self, ids: list[UUID], results: list[str], personality_types: list[str]
     ):
+        # Пакет результатов одним запросом
         query = """
-            INSERT INTO "OnboardingTestResult" (id, result, personality_type, user_id)
-            values ($1, $2, $3, $4)
+            UPDATE "OnboardingTestResult" AS o
+            SET result = u.result, personality_type = u.personality_type
+            FROM unnest($1::uuid[], $2::text[], $3::text[])
+                AS u(id, result, personality_type)
+            WHERE o.id = u.id
         """
-        return await self._conn.pool.execute(
-            query, _id, result, personality_type, user_id
+        return await self._conn.execute(
+            "user.update_onboarding_results", query, ids, results, personality_types
         )
 
+    async def get_onboarding_test(self, user_id: UUID):
+        query = """
+            SELECT result, personality_type FROM "OnboardingTestResult"
+            WHERE user_id = $1
+            LIMIT 1
+        """
+        return await self._conn.fetchrow("user.get_onboarding_test", query, user_id)
+
     async def create_user(
         self,
         _id: UUID,
@@ -50,7 +93,8 @@ class UserRepository:
             INSERT INTO "User" (id, first_name, second_name, email, password, created_at)
             values ($1, $2, $3, $4, $5, $6) RETURNING *
         """
-        return await self._conn.pool.execute(
+        return await self._conn.execute(
+            "user.create_user",
             query,
             _id,
             first_name,
@@ -65,7 +109,17 @@ class UserRepository:
             SELECT * FROM "User" as u
             WHERE u.email = $1
         """
-        return await self._conn.pool.fetchrow(query, email)
+        return await self._conn.fetchrow("user.get_user_by_email", query, email)
+
+    async def update_user_password(self, user_id: UUID, password: str):
+        query = """
+            UPDATE "User"
+            SET password = $1
+            WHERE id = $2
+        """
+        return await self._conn.execute(
+            "user.update_user_password", query, password, user_id
+        )
 
     async def create_session(
         self,
@@ -75,43 +129,49 @@ class UserRepository:
         created_at: datetime,
         expire_in: datetime,
     ):
-        async with self._conn.pool.acquire() as connection:
-            async with connection.transaction():
-                # Удаляем старую сессию
-                await connection.execute(
-                    'DELETE FROM "Session" WHERE user_id = $1', user_id
-                )
-                # Создаем новую сессию
-                return await connection.fetchrow(
-                    """
-                    INSERT INTO "Session" (id, user_id, session_token, created_at, expire_in)
-                    VALUES ($1, $2, $3, $4, $5)
-                    RETURNING *
-                    """,
-                    _id,
-                    user_id,
-                    session_token,
-                    created_at,
-                    expire_in,
-                )
+        # Одна сессия на пользователя: действующая сессия сохраняется,
+        # истёкшая заменяется новой. Параллельные входы получают один токен.
+        query = """
+            INSERT INTO "Session" AS s (id, user_id, session_token, created_at, expire_in)
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (user_id) DO UPDATE SET
+                id = CASE WHEN s.expire_in > EXCLUDED.created_at
+                    THEN s.id ELSE EXCLUDED.id END,
+                session_token = CASE WHEN s.expire_in > EXCLUDED.created_at
+                    THEN s.session_token ELSE EXCLUDED.session_token END,
+                created_at = CASE WHEN s.expire_in > EXCLUDED.created_at
+                    THEN s.created_at ELSE EXCLUDED.created_at END,
+                expire_in = CASE WHEN s.expire_in > EXCLUDED.created_at
+                    THEN s.expire_in ELSE EXCLUDED.expire_in END
+            RETURNING *
+        """
+        return await self._conn.fetchrow(
+            "user.create_session",
+            query,
+            _id,
+            user_id,
+            session_token,
+            created_at,
+            expire_in,
+        )
 
     async def get_session(self, session_token: str):
         query = """
-            SELECT s.session_token FROM "Session" as s
+            SELECT s.user_id, s.session_token, s.expire_in FROM "Session" as s
             WHERE s.session_token = $1
         """
-        return await self._conn.pool.fetchrow(query, session_token)
+        return await self._conn.fetchrow("user.get_session", query, session_token)
 
     async def get_session_by_user_id(self, user_id: UUID):
         query = """
-            SELECT s.session_token FROM "Session" as s
+            SELECT s.user_id, s.session_token, s.expire_in FROM "Session" as s
             WHERE s.user_id = $1
         """
-        return await self._conn.pool.fetchrow(query, user_id)
+        return await self._conn.fetchrow("user.get_session_by_user_id", query, user_id)
 
     async def delete_token(self, session_token: str):
         query = """
             DELETE FROM "Session"
             WHERE session_token = $1
         """
-        return await self._conn.pool.execute(query, session_token)
+        return await self._conn.execute("user.delete_token", query, session_token)
@@ -1,10 +1,20 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends, Query, Body, HTTPException
+from typing import Annotated, Any, Literal
+from fastapi import APIRouter, Depends, Query, Body, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from datetime import date, datetime
 from uuid import UUID
 
+from src.common.cache import CachedPayload, etag_matches
 from src.common.errors import BadRequestError
 from src.models.auth_pyd import JWTRequestPayload
+from src.common.responses import FastJSONResponse
+from src.models.calendar_pyd import (
+    CalendarEntriesPage,
+    MoodResponse,
+    MoodsPage,
+    MoodsResponse,
+    MoodsWithDatePage,
+)
 from src.interfaces.router import BaseRouter
 from src.services.calendar_service import CalendarService
 from src.common.security import verify_token
@@ -55,20 +65,37 @@ class CalendarRouter(BaseRouter):
             except ValueError as e:
                 raise HTTPException(status_code=400, detail=str(e))
 
-        @router.get("/entries")
+        @router.get("/entries", response_model=CalendarEntriesPage)
         async def get_calendar_entries(
             credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
             start_date: Annotated[date, Query()],
             end_date: Annotated[date, Query()],
+            cursor: Annotated[str | None, Query()] = None,
+            limit: Annotated[int | None, Query(ge=1)] = None,
+            if_none_match: Annotated[str | None, Header()] = None,
         ):
             """
-            Получить записи календаря пользователя за период
+            Получить записи календаря пользователя за период (постранично)
             """
+            etag = await self.calendar_service.get_data_etag(credentials.sub)
+            if etag_matches(etag, if_none_match):
+                return self._not_modified(etag)
+
             try:
-                entries = await self.calendar_service.get_user_calendar_entries(
-                    user_id=credentials.sub, start_date=start_date, end_date=end_date
+                (
+                    entries,
+                    next_cursor,
+                ) = await self.calendar_service.get_user_calendar_entries(
+                    user_id=credentials.sub,
+                    start_date=start_date,
+                    end_date=end_date,
+                    cursor=cursor,
+                    limit=limit,
+                )
+                return FastJSONResponse(
+                    {"entries": entries, "next_cursor": next_cursor},
+                    headers=self._versioned_headers(etag),
                 )
-                return {"entries": entries}
             except ValueError as e:
                 raise HTTPException(status_code=400, detail=str(e))
 
@@ -121,35 +148,119 @@ class CalendarRouter(BaseRouter):
             except ValueError as e:
                 raise HTTPException(status_code=400, detail=str(e))
 
-        @router.get("/moods/period")
+        @router.post("/moods/bulk")
+        async def bulk_create_moods(
+            credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
+            moods: Annotated[list[Any], Body(embed=True)],
+        ):
+            """
+            Пакетно создать записи настроения за разные даты
+            """
+            return await self.calendar_service.bulk_create_moods(
+                moods=moods, user_id=credentials.sub
+            )
+
+        @router.get("/moods/period", response_model=MoodsWithDatePage)
         async def get_moods_by_period(
             credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
             start_date: Annotated[date, Query()],
             end_date: Annotated[date, Query()],
+            cursor: Annotated[str | None, Query()] = None,
+            limit: Annotated[int | None, Query(ge=1)] = None,
+            if_none_match: Annotated[str | None, Header()] = None,
         ):
             """
-            Получить все настроения за период
+            Получить настроения за период (постранично)
             """
-            moods = await self.calendar_service.get_moods_by_period(
-                user_id=credentials.sub, start_date=start_date, end_date=end_date
+            etag = await self.calendar_service.get_data_etag(credentials.sub)
+            if etag_matches(etag, if_none_match):
+                return self._not_modified(etag)
+
+            moods, next_cursor = await self.calendar_service.get_moods_by_period(
+                user_id=credentials.sub,
+                start_date=start_date,
+                end_date=end_date,
+                cursor=cursor,
+                limit=limit,
+            )
+            return FastJSONResponse(
+                {"moods": moods, "next_cursor": next_cursor},
+                headers=self._versioned_headers(etag),
+            )
+
+        @router.get("/export")
+        async def export_mood_history(
+            credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
+            export_format: Annotated[
+                Literal["ndjson", "csv"], Query(alias="format")
+            ] = "ndjson",
+        ):
+            """
+            Выгрузить всю историю календаря и настроений потоком (NDJSON или CSV)
+            """
+            media_type = (
+                "application/x-ndjson" if export_format == "ndjson" else "text/csv"
+            )
+            return StreamingResponse(
+                self.calendar_service.export_mood_history(
+                    user_id=credentials.sub, export_format=export_format
+                ),
+                media_type=media_type,
+                headers={
+                    "Content-Disposition": f'attachment; filename="moods.{export_format}"',
+                    "X-Accel-Buffering": "no",
+                },
             )
-            return {"moods": moods}
 
         @router.get("/moods/statistics")
         async def get_mood_statistics(
             credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
             start_date: Annotated[date, Query()],
             end_date: Annotated[date, Query()],
+            if_none_match: Annotated[str | None, Header()] = None,
         ):
             """
             Получить статистику по настроениям за период
             """
+            etag = await self.calendar_service.get_data_etag(credentials.sub)
+            if etag_matches(etag, if_none_match):
+                return self._not_modified(etag)
+
             stats = await self.calendar_service.get_mood_statistics(
                 user_id=credentials.sub, start_date=start_date, end_date=end_date
             )
-            return {"statistics": stats}
+            return FastJSONResponse(
+                {"statistics": stats}, headers=self._versioned_headers(etag)
+            )
+
+        @router.get("/moods/distribution")
+        async def get_mood_distribution(
+            credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
+            start_date: Annotated[date, Query()],
+            end_date: Annotated[date, Query()],
+            bucket: Annotated[
+                Literal["time_of_day", "weekday"], Query()
+            ] = "time_of_day",
+            if_none_match: Annotated[str | None, Header()] = None,
+        ):
+            """
+            Получить распределение типов настроения по времени суток или дням недели
+            """
+            etag = await self.calendar_service.get_data_etag(credentials.sub)
+            if etag_matches(etag, if_none_match):
+                return self._not_modified(etag)
 
-        @router.get("/moods/{mood_id}")
+            distribution = await self.calendar_service.get_mood_distribution(
+                user_id=credentials.sub,
+                start_date=start_date,
+                end_date=end_date,
+                bucket=bucket,
+            )
+            return FastJSONResponse(
+                {"distribution": distribution}, headers=self._versioned_headers(etag)
+            )
+
+        @router.get("/moods/{mood_id}", response_model=MoodResponse)
         async def get_mood(
             credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
             mood_id: UUID,
@@ -161,36 +272,47 @@ class CalendarRouter(BaseRouter):
                 mood = await self.calendar_service.get_mood(mood_id, credentials.sub)
                 if not mood:
                     raise HTTPException(status_code=404, detail="Mood not found")
-                return {"mood": mood}
+                return FastJSONResponse({"mood": mood})
             except ValueError as e:
                 raise HTTPException(status_code=403, detail=str(e))
 
-        @router.get("/moods/calendar/{calendar_id}")
+        @router.get("/moods/calendar/{calendar_id}", response_model=MoodsPage)
         async def get_moods_by_calendar(
             credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
             calendar_id: UUID,
+            cursor: Annotated[str | None, Query()] = None,
+            limit: Annotated[int | None, Query(ge=1)] = None,
         ):
             """
-            Получить все настроения для календарной записи
+            Получить настроения для календарной записи (постранично)
             """
             try:
-                moods = await self.calendar_service.get_moods_by_calendar(calendar_id)
-                return {"moods": moods}
+                moods, next_cursor = await self.calendar_service.get_moods_by_calendar(
+                    calendar_id, cursor=cursor, limit=limit
+                )
+                return FastJSONResponse({"moods": moods, "next_cursor": next_cursor})
             except ValueError as e:
                 raise HTTPException(status_code=403, detail=str(e))
 
-        @router.get("/moods/date/{target_date}")
+        @router.get("/moods/date/{target_date}", response_model=MoodsResponse)
         async def get_moods_by_date(
             credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
             target_date: date,
+            if_none_match: Annotated[str | None, Header()] = None,
         ):
             """
             Получить все настроения для конкретной даты
             """
+            etag = await self.calendar_service.get_data_etag(credentials.sub)
+            if etag_matches(etag, if_none_match):
+                return self._not_modified(etag)
+
             moods = await self.calendar_service.get_moods_by_date(
                 target_date, credentials.sub
             )
-            return {"moods": moods}
+            return FastJSONResponse(
+                {"moods": moods}, headers=self._versioned_headers(etag)
+            )
 
         @router.delete("/moods/{mood_id}")
         async def delete_mood(
@@ -211,9 +333,33 @@ class CalendarRouter(BaseRouter):
                 raise HTTPException(status_code=403, detail=str(e))
 
         @router.get("/mood/types")
-        async def get_all_mood_types():
-            return await self.calendar_service.get_all_mood_types()
+        async def get_all_mood_types(
+            if_none_match: Annotated[str | None, Header()] = None,
+        ):
+            payload = await self.calendar_service.get_all_mood_types()
+            return self._cached_response(payload, if_none_match)
 
         @router.get("/activity/types")
-        async def get_all_mood_types():
-            return await self.calendar_service.get_all_activity_types()
+        async def get_all_activity_types(
+            if_none_match: Annotated[str | None, Header()] = None,
+        ):
+            payload = await self.calendar_service.get_all_activity_types()
+            return self._cached_response(payload, if_none_match)
+
+    @staticmethod
+    def _versioned_headers(etag: str) -> dict[str, str]:
+        # Ответы зависят от пользователя: общие кеши не должны их хранить
+        return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    @classmethod
+    def _not_modified(cls, etag: str) -> Response:
+        return Response(status_code=304, headers=cls._versioned_headers(etag))
+
+    @staticmethod
+    def _cached_response(payload: CachedPayload, if_none_match: str | None) -> Response:
+        headers = {"ETag": payload.etag, "Cache-Control": "no-cache"}
+        if etag_matches(payload.etag, if_none_match):
+            return Response(status_code=304, headers=headers)
+        return Response(
+            content=payload.body, media_type="application/json", headers=headers
+        )
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Response
+from fastapi import APIRouter, Depends, Response
 
+from src.common.database.postgres import Postgres
+from src.common.security import verified_token_cache, verify_admin
 from src.interfaces.router import BaseRouter
 from src.services.example import ExampleService
 
@@ -8,10 +10,12 @@ class DefaultRouter(BaseRouter):
     def __init__(
         self,
         example_service: ExampleService,
+        db: Postgres,
         base_prefix: str = "",
         tags: list[str] | None = None,
     ):
         self.example_service = example_service
+        self.db = db
         self._base_prefix = base_prefix
         self._tags = tags or []
 
@@ -37,3 +41,11 @@ class DefaultRouter(BaseRouter):
         @router.get("/ready")
         async def ready(response: Response) -> dict:
             return {"status": "ok"}
+
+        @router.get("/internal/token_cache", dependencies=[Depends(verify_admin)])
+        async def token_cache_stats() -> dict:
+            return verified_token_cache.stats()
+
+        @router.get("/internal/db", dependencies=[Depends(verify_admin)])
+        async def db_stats() -> dict:
+            return self.db.stats()
@@ -1,15 +1,19 @@
 from uuid import UUID
 from typing import Annotated
 
-from fastapi import APIRouter, status, Query, Depends
+from fastapi import APIRouter, status, Query, Depends, Body
 
 from src.services.auth_service import AuthService
 from src.interfaces.router import BaseRouter
 from src.services.llm_service import LLMService
+from src.services.report_service import ReportService
 from src.models.auth_pyd import JWTRequestPayload
 from src.interfaces.router import BaseRouter
 from src.services.auth_service import AuthService
-from src.common.security import verify_token
+from src.common import epi
+from src.common.errors import BadRequestError
+from src.common.security import verify_admin, verify_token
+from src.common.sse import sse_response
 
 
 class LLMRouter(BaseRouter):
@@ -17,11 +21,13 @@ class LLMRouter(BaseRouter):
         self,
         llm_service: LLMService,
         auth_service: AuthService,
+        report_service: ReportService,
         base_prefix: str = "",
         tags: list[str] | None = None,
     ):
         self.llm_service = llm_service
         self.auth_service = auth_service
+        self.report_service = report_service
         self._base_prefix = base_prefix
         self._tags = tags or []
 
@@ -43,22 +49,88 @@ class LLMRouter(BaseRouter):
         @router.post("/onboarding_test", status_code=status.HTTP_201_CREATED)
         async def onboarding_test(
             credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
-            test_result: list[bool] = Query(..., description=""),
+            test_result: list[bool] | None = Query(None, description=""),
+            answers: str | None = Query(
+                None, description="57 символов 0/1, первый - ответ на вопрос 1"
+            ),
         ):
-            response = self.llm_service.score_epi(test_result)
+            try:
+                if answers is None:
+                    if test_result is None:
+                        raise ValueError("Either answers or test_result is required")
+                    answers = epi.to_bitstring(epi.pack_answers(test_result))
+                response = self.llm_service.score_epi(answers)
+            except ValueError as e:
+                raise BadRequestError(detail=str(e))
+
             await self.auth_service.create_onboarding_test(
-                result=str(response["interpretation"]), user_id=UUID(credentials.sub)
+                result=str(response["interpretation"]),
+                personality_type=str(response["personality_type"]),
+                responses=answers,
+                user_id=UUID(credentials.sub),
             )
 
-        @router.post("/generate_repport")
-        def generate_weekly_report():
-            from src.repositories.llm_repository import LLMRepository
+        @router.post("/generate_repport", status_code=status.HTTP_202_ACCEPTED)
+        async def generate_weekly_report(
+            credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
+        ):
+            return await self.report_service.submit(credentials.sub)
 
-            calendar_dump = LLMRepository.get_data_for_weekly_report()
-            from src.routers.llm_all import generate_report_llm  # to do
+        @router.get("/reports/{job_id}")
+        async def get_report_job(
+            credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
+            job_id: UUID,
+        ):
+            return await self.report_service.get_job(job_id, credentials.sub)
 
-            pass
+        @router.get("/reports/{job_id}/result")
+        async def get_report_result(
+            credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
+            job_id: UUID,
+        ):
+            return await self.report_service.get_result(job_id, credentials.sub)
+
+        @router.get("/generate_repport/stream")
+        async def stream_weekly_report(
+            credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
+        ):
+            start_date, end_date = self.report_service.current_week()
+            (
+                calendar_dump,
+                onboarding_test_data,
+            ) = await self.report_service.collect_report_input(
+                credentials.sub, start_date, end_date
+            )
+            return sse_response(
+                self.llm_service.stream_report_llm(calendar_dump, onboarding_test_data)
+            )
+
+        @router.post("/one_time_help")
+        async def one_time_help(
+            credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
+            user_prompt: Annotated[str, Body(embed=True)],
+        ):
+            return await self.llm_service.generate_responce_one_time(user_prompt)
+
+        @router.post("/one_time_help/stream")
+        async def stream_one_time_help(
+            credentials: Annotated[JWTRequestPayload, Depends(verify_token)],
+            user_prompt: Annotated[str, Body(embed=True)],
+        ):
+            return sse_response(self.llm_service.stream_responce_one_time(user_prompt))
 
         @router.get("/cookie")
-        def get_cookie():
-            return self.llm_service.generate_cookie()
+        async def get_cookie():
+            return await self.llm_service.generate_cookie()
+
+        @router.get("/cookie/stream")
+        async def stream_cookie():
+            return sse_response(self.llm_service.stream_cookie())
+
+        @router.get("/internal/llm_cache", dependencies=[Depends(verify_admin)])
+        async def llm_cache_stats() -> dict:
+            return self.llm_service.cache_stats()
+
+        @router.get("/internal/llm_speculation", dependencies=[Depends(verify_admin)])
+        async def llm_speculation_stats() -> dict:
+            return self.llm_service.speculation_stats_snapshot()
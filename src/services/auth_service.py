@@ -3,10 +3,12 @@ from re import A
 from uuid import uuid4, UUID
 import jwt
 
-import bcrypt
 from loguru import logger
 
 from src.common.errors import BadRequestError, asyncpg_errors_decorator
+from src.common.password_hasher import PasswordHasher
+from src.common.security import verified_token_cache
+from src.interfaces.session_store import BaseSessionStore, SessionRecord
 from src.models.forms.auth_forms import RegisterForm
 from src.repositories.user_repository import UserRepository
 from src.models.auth_pyd import UserLogin
@@ -14,9 +16,17 @@ from src.models.config import JWTConfig
 
 
 class AuthService:
-    def __init__(self, user_repo: UserRepository, config: JWTConfig):
+    def __init__(
+        self,
+        user_repo: UserRepository,
+        config: JWTConfig,
+        password_hasher: PasswordHasher,
+        session_store: BaseSessionStore,
+    ):
         self.user_repo = user_repo
         self.config = config
+        self.password_hasher = password_hasher
+        self.session_store = session_store
 
     async def get_info_about_user(self, _id: UUID):
         return await self.user_repo.get_user_data_by_id(_id)
@@ -26,7 +36,7 @@ class AuthService:
         _id = uuid4()
         creation_date_utc = datetime.now(timezone.utc)
         creation_date_naive = creation_date_utc.replace(tzinfo=None)
-        password = bcrypt.hashpw(user_data.password.encode(), bcrypt.gensalt()).decode()
+        password = await self.password_hasher.hash(user_data.password)
 
         await self.user_repo.create_user(
             _id=_id,
@@ -44,81 +54,57 @@ class AuthService:
         session_id = uuid4()
         created_at_utc = datetime.now(timezone.utc)
         expire_at_utc = created_at_utc + timedelta(hours=10)
-        token = await self._generate_session_token(user_id, created_at_utc)
+        token = self._generate_session_token(user_id, created_at_utc, expire_at_utc)
 
         created_at_naive = created_at_utc.replace(tzinfo=None)
         expire_at_naive = expire_at_utc.replace(tzinfo=None)
 
-        await self.user_repo.create_session(
-            _id=session_id,
-            user_id=user_id,
-            session_token=token,
+        # Один запрос: если текущая сессия ещё действует, вернётся её токен
+        session = await self.session_store.save(
+            session_id,
+            SessionRecord(
+                user_id=user_id, session_token=token, expire_in=expire_at_naive
+            ),
             created_at=created_at_naive,
-            expire_in=expire_at_naive,
         )
 
-        return token
+        return session.session_token
 
     async def login(self, user_data: UserLogin):
         user = await self.user_repo.get_user_by_email(user_data.email)
-        if not user or not bcrypt.checkpw(
-            user_data.password.encode(), user["password"].encode()
+        if not user or not await self.password_hasher.verify(
+            user_data.password, user["password"]
         ):
             raise BadRequestError(detail="Wrong username or password")
+
+        # Пароль верный: перехешируем, если изменилась настроенная стоимость bcrypt
+        if self.password_hasher.needs_rehash(user["password"]):
+            password = await self.password_hasher.hash(user_data.password)
+            await self.user_repo.update_user_password(user["id"], password)
+
         return await self.create_session(user_id=user["id"])
 
     async def logout(self, session_token: str):
-        return await self.user_repo.delete_token(session_token=session_token)
+        verified_token_cache.discard(session_token)
+        return await self.session_store.delete(session_token)
 
-    async def _generate_session_token(
-        self, user_id: UUID, created_at: datetime | None = None
+    def _generate_session_token(
+        self, user_id: UUID, created_at: datetime, expire_at: datetime
     ) -> str:
-        existed_session = await self.user_repo.get_session_by_user_id(user_id)
-
-        if existed_session and existed_session.get("session_token"):
-            token_str = existed_session["session_token"]
-            try:
-                jwt.decode(
-                    token_str,
-                    key=self.config.JWT_PUBLIC_KEY,
-                    algorithms=["EdDSA"],
-                    options={"verify_signature": True, "verify_exp": True},
-                )
-                return token_str
-            except Exception as e:
-                logger.debug(f"Existing token is invalid, creating new one: {e}")
-
-        created_at_utc = created_at or datetime.now(timezone.utc)
-        expire_at_utc = created_at_utc + timedelta(hours=10)
-
-        new_token = jwt.encode(
+        return jwt.encode(
             payload={
                 "sub": str(user_id),
-                "iat": created_at_utc,
-                "exp": expire_at_utc,
+                "iat": created_at,
+                "exp": expire_at,
                 "type": "session",
             },
             key=self.config.JWT_PRIVATE_KEY,
             algorithm="EdDSA",
         )
 
-        created_at_naive = created_at_utc.replace(tzinfo=None)
-        expire_at_naive = expire_at_utc.replace(tzinfo=None)
-
-        session_id = uuid4()
-        await self.user_repo.create_session(
-            _id=session_id,
-            user_id=user_id,
-            session_token=new_token,
-            created_at=created_at_naive,
-            expire_in=expire_at_naive,
-        )
-
-        return new_token
-
     async def check_auth(self, session_token: str):
-        db_token = await self.user_repo.get_session(session_token=session_token)
-        if not db_token:
+        session = await self.session_store.get(session_token)
+        if not session:
             return False
         try:
             jwt.decode(
@@ -141,9 +127,13 @@ class AuthService:
             options={"verify_signature": True, "verify_exp": True},
         )
 
-    async def create_onboarding_test(self, result: str, user_id: UUID):
+    async def get_onboarding_test(self, user_id: UUID):
+        return await self.user_repo.get_onboarding_test(user_id)
+
+    async def create_onboarding_test(
+        self, result: str, personality_type: str, responses: str, user_id: UUID
+    ):
         _id = uuid4()
-        personality_type = "Холерик"
         return await self.user_repo.create_onboarding_test(
-            _id, result, personality_type
+            _id, result, personality_type, user_id, responses
         )
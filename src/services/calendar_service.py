@@ -1,36 +1,100 @@
-from datetime import datetime, date, timedelta, time
-from typing import Any
+import asyncio
+import csv
+import io
+import re
+from functools import partial
+from itertools import islice
+from datetime import datetime, date, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Literal
 from uuid import UUID, uuid4
 
+from asyncpg import Record
+from pydantic import ValidationError
+
+from src.common.cache import CachedPayload, TTLCache, dump_json
+from src.common.errors import BadRequestError
+from src.common.month_cache import (
+    Month,
+    MonthView,
+    MonthViewCache,
+    entry_key,
+    month_bounds,
+    months_between,
+    mood_key,
+)
+from src.common.mood_frame import MoodFrame
+from src.common.pagination import decode_cursor, paginate
+from src.models.calendar_pyd import MoodInput
+from src.models.config import CalendarConfig
 from src.repositories.calendar_repository import CalendarRepository
 from src.repositories.todo_calendar_repository import TodoCalendarRepository
 
+# Тот же формат, что распознаёт TIME_OF_DAY_SQL: часы 0-23, минуты 00-59
+TIME_PATTERN = re.compile(r"([01]?\d|2[0-3]):[0-5]\d")
+
 
 class CalendarService:
+    REFERENCE_CACHE_TTL = 300
+    BULK_MOODS_MAX_ITEMS = 5000
+    EXPORT_COLUMNS = (
+        "date",
+        "calendar_id",
+        "mood_id",
+        "mood_type_id",
+        "activity_type_id",
+        "time_start",
+        "time_end",
+    )
+    EXPORT_CHUNK_SIZE = 64 * 1024
+    # Выгрузка держит соединение пула, пока клиент читает ответ
+    EXPORT_MAX_CONCURRENCY = 4
+    EXPORT_IDLE_TIMEOUT = 60
+    # Неделя может захватить два месяца; более длинные периоды читаются из БД
+    MONTH_CACHE_MAX_MONTHS = 2
+
     def __init__(
         self,
         calendar_repo: CalendarRepository,
         todo_calendar_repo: TodoCalendarRepository,
+        config: CalendarConfig,
     ):
         self.calendar_repo = calendar_repo
         self.todo_calendar_repo = todo_calendar_repo
+        self.config = config
+        self._reference_cache = TTLCache(ttl=self.REFERENCE_CACHE_TTL)
+        self._reference_lock = asyncio.Lock()
+        self._export_slots = asyncio.Semaphore(self.EXPORT_MAX_CONCURRENCY)
+        self._month_cache = MonthViewCache(config.CALENDAR_MONTH_CACHE_MAX_BYTES)
 
     async def create_calendar(self, date: date, user_id: UUID):
         _id = uuid4()
-        return await self.calendar_repo.create_calendar_entry(_id, date, user_id)
+        entry = await self.calendar_repo.create_calendar_entry(_id, date, user_id)
+        self._month_cache.invalidate(user_id, date)
+        return entry
 
     async def get_calendar(self, _id: UUID):
         return await self.get_calendar(_id)
 
+    async def get_data_etag(self, user_id: str) -> str:
+        """
+        ETag данных календаря пользователя: версия растёт при каждой записи,
+        поэтому совпадение означает, что ответ не изменился
+        """
+        version = await self.calendar_repo.get_data_version(UUID(user_id))
+        return f'"{user_id}.{version}"'
+
     async def get_user_calendar_entries(
         self,
         user_id: UUID,
         start_date: date | None = None,
         end_date: date | None = None,
         period: date | None = None,
-    ) -> list[dict[str, Any]]:
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[Record], str | None]:
         """
-        Получить записи календаря пользователя с различными вариантами фильтрации
+        Получить страницу записей календаря пользователя с различными вариантами
+        фильтрации и курсор следующей страницы (None, если страница последняя)
         """
         # Если указан период, вычисляем даты автоматически
         if period and not (start_date or end_date):
@@ -42,11 +106,37 @@ class CalendarService:
         if isinstance(end_date, datetime):
             end_date = end_date.date()
 
-        entries = await self.calendar_repo.get_user_calendar_entries(
-            user_id=user_id, start_date=start_date, end_date=end_date
-        )
+        limit = self._page_size(limit)
+        after = decode_cursor(cursor, date.fromisoformat, UUID) if cursor else None
+        views = await self._month_views(user_id, start_date, end_date)
+        if views is not None:
+            # Месяцы идут по возрастанию, а записи внутри месяца - по убыванию
+            entries = list(
+                islice(
+                    (
+                        entry
+                        for view in reversed(views)
+                        for entry in view.entries
+                        if start_date <= entry["date"] <= end_date
+                        and (after is None or entry_key(entry) < after)
+                    ),
+                    limit + 1,
+                )
+            )
+        else:
+            entries = await self.calendar_repo.get_user_calendar_entries(
+                user_id=user_id,
+                start_date=start_date,
+                end_date=end_date,
+                after=after,
+                limit=limit + 1,
+            )
+
+        entries, next_cursor = paginate(entries, limit, key=entry_key)
+        return entries, next_cursor
 
-        return [dict(entry) for entry in entries] if entries else []
+    def _page_size(self, limit: int | None) -> int:
+        return min(limit or self.config.PAGE_SIZE_DEFAULT, self.config.PAGE_SIZE_MAX)
 
     def _calculate_period_dates(self, period: str) -> tuple[date, date]:
         """
@@ -74,6 +164,41 @@ class CalendarService:
         else:
             raise ValueError(f"Unknown period: {period}")
 
+    async def _month_views(
+        self, user_id: UUID, start_date: date | None, end_date: date | None
+    ) -> list[MonthView] | None:
+        """
+        Месячные представления, покрывающие период, по возрастанию месяцев.
+        None - период не подходит для кеша и читается из БД напрямую.
+        """
+        if not (self._month_cache.enabled and start_date and end_date):
+            return None
+        if start_date > end_date:
+            return None
+
+        months = list(months_between(start_date, end_date))
+        if len(months) > self.MONTH_CACHE_MAX_MONTHS:
+            return None
+
+        return [
+            await self._month_cache.get_or_load(
+                user_id,
+                month,
+                partial(self._load_month_view, user_id, month),
+            )
+            for month in months
+        ]
+
+    async def _load_month_view(self, user_id: UUID, month: Month) -> MonthView:
+        start_date, end_date = month_bounds(month)
+        entries, moods = await self.calendar_repo.get_month_view(
+            user_id=user_id, start_date=start_date, end_date=end_date
+        )
+        return MonthView(entries, moods)
+
+    def month_cache_stats(self) -> dict[str, int]:
+        return self._month_cache.stats()
+
     async def create_mood(
         self,
         mood_type_id: UUID,
@@ -95,8 +220,7 @@ class CalendarService:
             raise ValueError("Calendar entry does not belong to user")
 
         # Валидация времени
-        if time_start and time_end:
-            self._validate_time_range(time_start, time_end)
+        self._validate_time_range(time_start, time_end)
 
         _id = uuid4()
 
@@ -107,7 +231,9 @@ class CalendarService:
             time_start=time_start,
             time_end=time_end,
             calendar_id=calendar_id,
+            user_id=user_id,
         )
+        self._month_cache.invalidate(user_id, calendar_entry["date"])
 
         return dict(mood) if mood else None
 
@@ -125,18 +251,19 @@ class CalendarService:
         (автоматически создает или находит календарную запись)
         """
         # Ищем календарную запись для даты
-        calendar_entries = await self.calendar_repo.get_user_calendar_entries(
-            user_id=user_id, start_date=target_date, end_date=target_date
+        calendar_entry = await self.calendar_repo.get_calendar_by_date(
+            user_id=user_id, date=target_date
         )
 
-        if calendar_entries:
-            calendar_id = calendar_entries[0]["id"]
+        if calendar_entry:
+            calendar_id = calendar_entry["id"]
         else:
             # Создаем новую календарную запись
             calendar_id = uuid4()
             calendar_entry = await self.calendar_repo.create_calendar_entry(
                 _id=calendar_id, date=target_date, user_id=user_id
             )
+            self._month_cache.invalidate(user_id, target_date)
             calendar_id = calendar_entry["id"]
 
         return await self.create_mood(
@@ -148,80 +275,245 @@ class CalendarService:
             user_id=user_id,
         )
 
-    async def get_mood(self, mood_id: UUID, user_id: UUID) -> dict[str, Any] | None:
+    async def bulk_create_moods(self, moods: list[Any], user_id: str) -> dict[str, Any]:
+        """
+        Пакетно создать настроения за разные даты. Элементы разбираются по
+        одному: некорректные не прерывают загрузку, а возвращаются в errors
+        с индексом.
+        """
+        if len(moods) > self.BULK_MOODS_MAX_ITEMS:
+            raise BadRequestError(
+                detail=f"Too many moods: at most {self.BULK_MOODS_MAX_ITEMS} per request"
+            )
+
+        _, mood_type_ids = await self._get_reference(
+            "mood_types", self.calendar_repo.get_all_moot_types
+        )
+        _, activity_type_ids = await self._get_reference(
+            "activity_types", self.calendar_repo.get_all_activity_types
+        )
+
+        errors: list[dict[str, Any]] = []
+        accepted: list[tuple[int, tuple]] = []
+        for index, item in enumerate(moods):
+            try:
+                mood = MoodInput.model_validate(item)
+            except ValidationError as e:
+                errors.append({"index": index, "detail": self._format_errors(e)})
+                continue
+
+            try:
+                if mood.mood_type_id not in mood_type_ids:
+                    raise ValueError("Unknown mood type")
+                if mood.activity_type_id not in activity_type_ids:
+                    raise ValueError("Unknown activity type")
+                self._validate_time_range(mood.time_start, mood.time_end)
+            except ValueError as e:
+                errors.append({"index": index, "detail": str(e)})
+                continue
+
+            record = (
+                uuid4(),
+                mood.mood_type_id,
+                mood.activity_type_id,
+                mood.time_start,
+                mood.time_end,
+                mood.target_date,
+            )
+            accepted.append((index, record))
+
+        calendar_ids = {}
+        if accepted:
+            days = {record[-1]: uuid4() for _, record in accepted}
+            calendar_ids = await self.calendar_repo.bulk_create_moods(
+                user_id=UUID(user_id),
+                days=days,
+                moods=[record for _, record in accepted],
+            )
+            for day in calendar_ids:
+                self._month_cache.invalidate(user_id, day)
+
+        created = []
+        for index, record in accepted:
+            if record[-1] in calendar_ids:
+                created.append(record[0])
+            else:
+                # День создан параллельным запросом между проверкой и вставкой
+                errors.append(
+                    {
+                        "index": index,
+                        "detail": "Calendar entry was created concurrently, retry",
+                    }
+                )
+        errors.sort(key=lambda error: error["index"])
+
+        return {"created": len(created), "ids": created, "errors": errors}
+
+    @staticmethod
+    def _format_errors(error: ValidationError) -> str:
+        return "; ".join(
+            f"{'.'.join(str(part) for part in item['loc']) or 'item'}: {item['msg']}"
+            for item in error.errors()
+        )
+
+    async def get_mood(self, mood_id: UUID, user_id: UUID) -> Record | None:
         """
         Получить запись настроения по ID с проверкой прав доступа
         """
-        mood = await self.calendar_repo.get_mood(mood_id)
-        return dict(mood)
+        return await self.calendar_repo.get_mood(mood_id)
 
     async def get_moods_by_calendar(
         self,
         calendar_id: UUID,
-    ) -> list[dict[str, Any]]:
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[Record], str | None]:
         """
-        Получить все настроения для календарной записи с проверкой прав
+        Получить страницу настроений для календарной записи
         """
-        moods = await self.calendar_repo.get_moods_by_calendar(calendar_id)
-        return [dict(mood) for mood in moods] if moods else []
+        limit = self._page_size(limit)
+        after = decode_cursor(cursor, str, UUID) if cursor else None
+        moods = await self.calendar_repo.get_moods_by_calendar(
+            calendar_id, after=after, limit=limit + 1
+        )
 
-    async def get_moods_by_date(
-        self, target_date: date, user_id: UUID
-    ) -> list[dict[str, Any]]:
+        moods, next_cursor = paginate(
+            moods, limit, key=lambda mood: (mood["time_start"] or "00:00", mood["id"])
+        )
+        return moods, next_cursor
+
+    async def get_moods_by_date(self, target_date: date, user_id: UUID) -> list[Record]:
         """
         Получить все настроения для конкретной даты
         """
-        calendar_entries = await self.calendar_repo.get_user_calendar_entries(
+        views = await self._month_views(user_id, target_date, target_date)
+        if views is not None:
+            return [mood for mood in views[0].moods if mood["date"] == target_date]
+
+        moods = await self.calendar_repo.get_moods_by_period(
             user_id=UUID(user_id), start_date=target_date, end_date=target_date
         )
+        return moods
 
-        if not calendar_entries:
-            return []
+    async def get_moods_by_period(
+        self,
+        user_id: UUID,
+        start_date: date,
+        end_date: date,
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[Record], str | None]:
+        """
+        Получить страницу настроений за период
+        """
+        # Одним запросом получаем настроения вместе с датой, уже отсортированные
+        limit = self._page_size(limit)
+        after = decode_cursor(cursor, date.fromisoformat, str, UUID) if cursor else None
+        views = await self._month_views(user_id, start_date, end_date)
+        if views is not None:
+            moods = list(
+                islice(
+                    (
+                        mood
+                        for view in views
+                        for mood in view.moods
+                        if start_date <= mood["date"] <= end_date
+                        and (after is None or mood_key(mood) > after)
+                    ),
+                    limit + 1,
+                )
+            )
+        else:
+            moods = await self.calendar_repo.get_moods_by_period(
+                user_id=user_id,
+                start_date=start_date,
+                end_date=end_date,
+                after=after,
+                limit=limit + 1,
+            )
 
-        calendar_id = calendar_entries[0]["id"]
-        return await self.get_moods_by_calendar(calendar_id)
+        moods, next_cursor = paginate(moods, limit, key=mood_key)
+        return moods, next_cursor
 
-    async def get_moods_by_period(
+    async def export_mood_history(
+        self, user_id: str, export_format: Literal["ndjson", "csv"]
+    ) -> AsyncIterator[bytes]:
+        """
+        Вся история пользователя (дни и настроения) порциями байт в NDJSON или CSV.
+        Строки читаются курсором, поэтому память не растёт с объёмом истории.
+        Одновременно читают не больше EXPORT_MAX_CONCURRENCY выгрузок, остальные
+        ждут своей очереди; клиент, переставший читать дольше EXPORT_IDLE_TIMEOUT,
+        теряет соединение с БД.
+        """
+        if export_format == "csv":
+            encode = self._encode_csv
+            # Заголовок уходит клиенту сразу, до первого запроса к БД
+            yield self._encode_csv(self.EXPORT_COLUMNS)
+        else:
+            encode = self._encode_ndjson
+
+        chunk = []
+        size = 0
+        flushed = False
+        async with self._export_slots:
+            records = self.calendar_repo.iter_mood_history(
+                UUID(user_id), idle_timeout=self.EXPORT_IDLE_TIMEOUT
+            )
+            async for record in records:
+                line = encode([record[column] for column in self.EXPORT_COLUMNS])
+                chunk.append(line)
+                size += len(line)
+                # Первую строку отдаём сразу, дальше копим порции
+                if size >= self.EXPORT_CHUNK_SIZE or not flushed:
+                    flushed = True
+                    yield b"".join(chunk)
+                    chunk = []
+                    size = 0
+
+        if chunk:
+            yield b"".join(chunk)
+
+    def _encode_ndjson(self, values: list) -> bytes:
+        return dump_json(dict(zip(self.EXPORT_COLUMNS, values))) + b"\n"
+
+    @staticmethod
+    def _encode_csv(values) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(
+            ["" if value is None else value for value in values]
+        )
+        return buffer.getvalue().encode("utf-8")
+
+    async def get_report_rows(
         self, user_id: UUID, start_date: date, end_date: date
-    ) -> list[dict[str, Any]]:
+    ) -> list[list[str]]:
         """
-        Получить все настроения за период
+        Журнал настроений для недельного отчёта: дата, время, эмоция, деятельность
         """
-        # Получаем календарные записи за период
-        calendar_entries = await self.calendar_repo.get_user_calendar_entries(
+        moods = await self.calendar_repo.get_moods_for_report(
             user_id=user_id, start_date=start_date, end_date=end_date
         )
-
-        if not calendar_entries:
-            return []
-
-        # Собираем все настроения для найденных календарных записей
-        all_moods = []
-        for calendar_entry in calendar_entries:
-            moods = await self.calendar_repo.get_moods_by_calendar(calendar_entry["id"])
-            for mood in moods:
-                mood_dict = dict(mood)
-                mood_dict["date"] = calendar_entry[
-                    "date"
-                ]  # Добавляем дату для удобства
-                all_moods.append(mood_dict)
-
-        # Сортируем по дате и времени
-        all_moods.sort(key=lambda x: (x["date"], x["time_start"] or "00:00"))
-
-        return all_moods
+        return [
+            [
+                mood["date"].strftime("%d.%m.%Y"),
+                f"{mood['time_start'] or ''}-{mood['time_end'] or ''}",
+                mood["mood_type"] or "",
+                mood["activity_type"] or "",
+            ]
+            for mood in moods
+        ]
 
     async def delete_mood(self, mood_id: UUID, user_id: UUID) -> bool:
         """
         Удалить запись настроения с проверкой прав
         """
-        # Проверяем права доступа
-        mood = await self.get_mood(mood_id, user_id)
-        if not mood:
+        # Права проверяет сам DELETE: чужое настроение не найдётся
+        deleted = await self.calendar_repo.delete_mood(mood_id, user_id=user_id)
+        if deleted is None:
             return False
 
-        deleted = await self.calendar_repo.delete_mood(mood_id)
-        return deleted is not None
+        self._month_cache.invalidate(deleted["user_id"], deleted["date"])
+        return True
 
     async def get_mood_statistics(
         self, user_id: UUID, start_date: date, end_date: date
@@ -229,86 +521,134 @@ class CalendarService:
         """
         Получить статистику по настроениям
         """
-        moods = await self.get_moods_by_period(user_id, start_date, end_date)
+        # Статистика собирается из дневной сводки, по сети передаются только итоги
+        rows = await self.calendar_repo.get_mood_statistics(
+            user_id=user_id, start_date=start_date, end_date=end_date
+        )
 
-        if not moods:
+        period = {
+            "start_date": start_date.isoformat() if start_date else None,
+            "end_date": end_date.isoformat() if end_date else None,
+        }
+        stats: dict[str, dict[Any, int]] = {
+            "total": {},
+            "time": {},
+            "mood_type": {},
+            "activity_type": {},
+        }
+        for row in rows:
+            stats[row["kind"]][row["key"]] = row["total"]
+
+        total_moods = stats["total"][None]
+        if not total_moods:
             return {
                 "total_moods": 0,
                 "mood_type_distribution": {},
                 "activity_type_distribution": {},
                 "time_distribution": {},
-                "period": {
-                    "start_date": start_date.isoformat() if start_date else None,
-                    "end_date": end_date.isoformat() if end_date else None,
-                },
+                "period": period,
             }
 
-        # Статистика по типам настроений
-        mood_type_stats = {}
-        activity_type_stats = {}
-        time_stats = {"morning": 0, "afternoon": 0, "evening": 0, "night": 0}
-
-        for mood in moods:
-            # Статистика по mood_type_id
-            mood_type = str(mood["mood_type_id"])
-            mood_type_stats[mood_type] = mood_type_stats.get(mood_type, 0) + 1
-
-            # Статистика по activity_type_id
-            activity_type = str(mood["activity_type_id"])
-            activity_type_stats[activity_type] = (
-                activity_type_stats.get(activity_type, 0) + 1
-            )
+        return {
+            "total_moods": total_moods,
+            "mood_type_distribution": stats["mood_type"],
+            "activity_type_distribution": stats["activity_type"],
+            "time_distribution": stats["time"],
+            "period": period,
+        }
 
-            # Статистика по времени суток
-            if mood["time_start"]:
-                time_category = self._categorize_time(mood["time_start"])
-                time_stats[time_category] += 1
+    async def get_mood_frame(
+        self, user_id: UUID, start_date: date, end_date: date
+    ) -> MoodFrame:
+        """
+        Настроения за период в колоночном виде для аналитики
+        """
+        columns = await self.calendar_repo.get_mood_columns(
+            user_id=user_id, start_date=start_date, end_date=end_date
+        )
+        return MoodFrame.from_columns(
+            days=columns["days"],
+            minutes=columns["minutes"],
+            mood_type_ids=columns["mood_type_ids"],
+            activity_type_ids=columns["activity_type_ids"],
+        )
 
+    async def get_mood_distribution(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        bucket: Literal["time_of_day", "weekday"],
+    ) -> dict[str, Any]:
+        """
+        Распределение типов настроения по времени суток или дням недели
+        """
+        frame = await self.get_mood_frame(UUID(user_id), start_date, end_date)
         return {
-            "total_moods": len(moods),
-            "mood_type_distribution": mood_type_stats,
-            "activity_type_distribution": activity_type_stats,
-            "time_distribution": time_stats,
+            "total_moods": len(frame),
+            "bucket": bucket,
+            "distribution": frame.mood_type_counts_by(bucket),
             "period": {
-                "start_date": start_date.isoformat() if start_date else None,
-                "end_date": end_date.isoformat() if end_date else None,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
             },
         }
 
-    def _validate_time_range(self, time_start: str, time_end: str) -> None:
+    def _validate_time_range(
+        self, time_start: str | None, time_end: str | None
+    ) -> None:
         """
-        Валидация временного диапазона
+        Валидация временного диапазона: каждое заданное время проверяется
+        отдельно, порядок - только если заданы оба
         """
-        try:
-            start = datetime.strptime(time_start, "%H:%M").time()
-            end = datetime.strptime(time_end, "%H:%M").time()
-
-            if start >= end:
-                raise ValueError("Start time must be before end time")
+        start = self._parse_minutes(time_start) if time_start else None
+        end = self._parse_minutes(time_end) if time_end else None
+        if start is not None and end is not None and start >= end:
+            raise ValueError("Start time must be before end time")
+
+    @staticmethod
+    def _parse_minutes(value: str) -> int:
+        if not TIME_PATTERN.fullmatch(value):
+            raise ValueError(f"Invalid time format: {value!r}, expected HH:MM")
+        hours, minutes = value.split(":")
+        return int(hours) * 60 + int(minutes)
+
+    async def get_all_mood_types(self) -> CachedPayload:
+        payload, _ = await self._get_reference(
+            "mood_types", self.calendar_repo.get_all_moot_types
+        )
+        return payload
 
-        except ValueError as e:
-            raise ValueError(f"Invalid time format: {e}")
+    async def get_all_activity_types(self) -> CachedPayload:
+        payload, _ = await self._get_reference(
+            "activity_types", self.calendar_repo.get_all_activity_types
+        )
+        return payload
 
-    def _categorize_time(self, time_str: str) -> str:
+    def invalidate_reference_cache(self, key: str | None = None) -> None:
         """
-        Категоризация времени суток
+        Сбросить кеш справочников (всех или одного: mood_types, activity_types)
         """
-        try:
-            time_obj = datetime.strptime(time_str, "%H:%M").time()
+        self._reference_cache.invalidate(key)
 
-            if time_obj < time(12, 0):
-                return "morning"
-            elif time_obj < time(17, 0):
-                return "afternoon"
-            elif time_obj < time(22, 0):
-                return "evening"
-            else:
-                return "night"
-        except ValueError:
-            return "unknown"
-
-    async def get_all_mood_types(self):
-        return await self.calendar_repo.get_all_moot_types()
-
-    async def get_all_activity_types(self):
-        return await self.calendar_repo.get_all_activity_types()
+    async def _get_reference(
+        self, key: str, fetch: Callable[[], Awaitable[list]]
+    ) -> tuple[CachedPayload, frozenset[UUID]]:
+        """
+        Справочник из кеша в виде готового JSON и множества id;
+        в БД идём только после истечения TTL
+        """
+        reference = self._reference_cache.get(key)
+        if reference is not None:
+            return reference
+
+        async with self._reference_lock:
+            reference = self._reference_cache.get(key)
+            if reference is None:
+                rows = await fetch()
+                reference = (
+                    CachedPayload.from_content([dict(row) for row in rows]),
+                    frozenset(row["id"] for row in rows),
+                )
+                self._reference_cache.set(key, reference)
+        return reference
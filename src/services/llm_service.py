@@ -1,118 +1,188 @@
+import asyncio
 import json
+from typing import AsyncIterator
 
 from src.clients.llm_client import LLMClient
-from src.common.const import E_KEYS, N_KEYS, L_KEYS
+from src.common import epi
 from src.common.prompts import *
 
 
 class LLMService:
-    def __init__(self, client: LLMClient):
-        self.client = client.client
-
-    def _score_scale(self, responses: list[bool], keys: list[int]) -> int:
-        """Считает баллы по одной шкале.
-        responses: список длины 57 (True/False), номера вопросов 1..57 соответствуют индексам 0..56.
-        keys: список целых: положительное -> 'Yes' даёт балл; отрицательное -> 'No' даёт балл.
-        """
-        if len(responses) != 57:
-            raise ValueError("Ожидается список длины 57 (пункты 1..57).")
-        score = 0
-        for k in keys:
-            idx = abs(k) - 1
-            ans = responses[idx]
-            if k > 0 and ans is True:
-                score += 1
-            if k < 0 and ans is False:
-                score += 1
-        return score
-
-    def score_epi(self, responses: list[bool]) -> dict[str, object]:
-        """Возвращает словарь с баллами."""
-        e = self._score_scale(responses, E_KEYS)
-        n = self._score_scale(responses, N_KEYS)
-        l = self._score_scale(responses, L_KEYS)
-
-        res = {
-            "E_raw": e,
-            "E_max": len(E_KEYS),
-            "N_raw": n,
-            "N_max": len(N_KEYS),
-            "L_raw": l,
-            "L_max": len(L_KEYS),
+    MODEL_NAME = "tngtech/deepseek-r1t2-chimera:free"
+
+    def __init__(self, client: LLMClient, speculative_answer: bool = False):
+        self.client = client
+        self.speculative_answer = speculative_answer
+        self.speculation_stats = {
+            "started": 0,
+            "used": 0,
+            "discarded": 0,
+            "cancelled": 0,
+            "wasted_completion_tokens": 0,
         }
 
-        interp = []
-        # Lie scale: обычно L >= 5 → вероятна социально-желательная искаженность ответов
-        if l >= 5:
-            interp.append(
-                f"Lie scale {l}/{res['L_max']}: возможна попытка выглядеть лучше (ответы могут быть искажены)."
-            )
-        else:
-            interp.append(
-                f"Lie scale {l}/{res['L_max']}: нет сильных признаков фальсификации."
-            )
-
-        # Extraversion
-        interp.append(
-            f"E (Extraversion): {e}/{res['E_max']} (чем выше — более экстравертированы)."
-        )
-
-        # Neuroticism
-        interp.append(
-            f"N (Neuroticism): {n}/{res['N_max']} (чем выше — более невротичны)."
-        )
-
-        res["interpretation"] = interp
+    def score_epi(self, responses: list[bool] | str) -> dict[str, object]:
+        """
+        Возвращает словарь с баллами. responses - 57 ответов True/False
+        или компактная строка из 57 символов 0/1.
+        """
+        if isinstance(responses, str):
+            return epi.score_answers(epi.parse_bitstring(responses))
+        return epi.score_answers(epi.pack_answers(responses))
 
-        return res
+    IRRELEVANT_ANSWER = "Вы задали нерелевантный запрос. Опишите свое эмоциональное состояние, если хотите получить помощь. "
+    CRITICAL_ANSWER = "Обратитесь с этой проблемой к специалисту."
 
-    def generate_report_llm(self, calendar_dump: list[list[str]], onboarding_test_data):
+    def _build_report_messages(
+        self, calendar_dump: list[list[str]], onboarding_test_data
+    ) -> list[dict[str, str]]:
         prompt = week_report1 + str(onboarding_test_data) + week_report2
         for row in calendar_dump:
             prompt += str(row) + "\n"
+        return [{"role": "user", "content": prompt}]
 
-        completion = self.client.chat.completions.create(
-            model="tngtech/deepseek-r1t2-chimera:free",
-            messages=[{"role": "user", "content": prompt}],
-        )
+    def _build_one_time_help_messages(self, user_prompt) -> list[dict[str, str]]:
+        return [
+            {"role": "system", "content": one_time_help},
+            {"role": "user", "content": user_prompt},
+        ]
 
-        res = completion.choices[0].message.content
-        schedule = json.loads(
-            res[res.rfind("```json") + 7 : res.rfind("```")]
-        )  # расписание, которое надо записать в дб. Будет списком списков.
-        return res  # возращаем фулл текст для ui. Мб вырезаем расписанием мб оставляем, пока оставляем.
+    def _build_cookie_messages(self) -> list[dict[str, str]]:
+        return [{"role": "user", "content": cookie_promt}]
 
-    def generate_responce_one_time(self, user_prompt):
-        completion = self.client.chat.completions.create(
-            model="tngtech/deepseek-r1t2-chimera:free",
+    async def _classify(self, user_prompt) -> str | None:
+        """Категория запроса по security_prompt: IRRELEVANT, STANDARD или CRITICAL."""
+        res = await self.client.complete(
+            model=self.MODEL_NAME,
             messages=[
                 {"role": "system", "content": security_prompt},
                 {"role": "user", "content": user_prompt},
             ],
+            call_type="classification",
+            validate=self._parse_category,
         )
+        return self._parse_category(res)
 
-        res = completion.choices[0].message.content
+    @staticmethod
+    def _parse_category(res: str) -> str | None:
         if res.rfind("```json") != -1:
             res = json.loads(res[res.rfind("```json") + 7 : res.rfind("```")])
         else:
             res = json.loads(res)
-        if res == "IRRELEVANT":
-            return "Вы задали нерелевантный запрос. Опишите свое эмоциональное состояние, если хотите получить помощь. "
-        elif res == "CRITICAL":
-            return "Обратитесь с этой проблемой к специалисту."
+        return res.get("category") if isinstance(res, dict) else res
+
+    def _rejection_answer(self, category: str | None) -> str | None:
+        if category == "IRRELEVANT":
+            return self.IRRELEVANT_ANSWER
+        elif category == "CRITICAL":
+            return self.CRITICAL_ANSWER
+        return None
+
+    async def generate_report_llm(
+        self, calendar_dump: list[list[str]], onboarding_test_data
+    ):
+        # Ответ без разбираемого блока расписания в кеш не попадает
+        res = await self.client.complete(
+            model=self.MODEL_NAME,
+            messages=self._build_report_messages(calendar_dump, onboarding_test_data),
+            call_type="report",
+            validate=self._parse_schedule,
+        )
+        schedule = self._parse_schedule(
+            res
+        )  # расписание, которое надо записать в дб. Будет списком списков.
+        return res  # возращаем фулл текст для ui. Мб вырезаем расписанием мб оставляем, пока оставляем.
 
-        completion = self.client.chat.completions.create(
-            model="tngtech/deepseek-r1t2-chimera:free",
-            messages=[
-                {"role": "system", "content": one_time_help},
-                {"role": "user", "content": user_prompt},
-            ],
+    @staticmethod
+    def _parse_schedule(res: str):
+        return json.loads(res[res.rfind("```json") + 7 : res.rfind("```")])
+
+    async def generate_responce_one_time(self, user_prompt):
+        if self.speculative_answer:
+            return await self._generate_responce_one_time_speculative(user_prompt)
+
+        rejection = self._rejection_answer(await self._classify(user_prompt))
+        if rejection:
+            return rejection
+
+        return await self.client.complete(
+            model=self.MODEL_NAME,
+            messages=self._build_one_time_help_messages(user_prompt),
+            call_type="one_time_help",
         )
-        return completion.choices[0].message.content
 
-    def generate_cookie(self):
-        completion = self.client.chat.completions.create(
-            model="tngtech/deepseek-r1t2-chimera:free",
-            messages=[{"role": "user", "content": cookie_promt}],
+    async def _generate_responce_one_time_speculative(self, user_prompt):
+        """
+        Классификация и ответ запускаются одновременно; ответ отбрасывается,
+        если запрос оказался IRRELEVANT или CRITICAL.
+        """
+        answer_task = asyncio.create_task(
+            self.client.complete_with_usage(
+                model=self.MODEL_NAME,
+                messages=self._build_one_time_help_messages(user_prompt),
+                call_type="one_time_help",
+            )
         )
-        return completion.choices[0].message.content
+        self.speculation_stats["started"] += 1
+
+        try:
+            rejection = self._rejection_answer(await self._classify(user_prompt))
+        except BaseException:
+            answer_task.cancel()
+            raise
+
+        if not rejection:
+            content, _ = await answer_task
+            self.speculation_stats["used"] += 1
+            return content
+
+        if answer_task.done() and not answer_task.cancelled():
+            if answer_task.exception() is None:
+                _, tokens = answer_task.result()
+                self.speculation_stats["wasted_completion_tokens"] += tokens
+            self.speculation_stats["discarded"] += 1
+        else:
+            answer_task.cancel()
+            self.speculation_stats["cancelled"] += 1
+        return rejection
+
+    async def generate_cookie(self):
+        return await self.client.complete(
+            model=self.MODEL_NAME,
+            messages=self._build_cookie_messages(),
+            call_type="cookie",
+        )
+
+    def cache_stats(self) -> dict[str, int]:
+        return self.client.cache.stats() if self.client.cache else {}
+
+    def speculation_stats_snapshot(self) -> dict[str, int]:
+        return dict(self.speculation_stats)
+
+    async def stream_report_llm(
+        self, calendar_dump: list[list[str]], onboarding_test_data
+    ) -> AsyncIterator[str]:
+        async for token in self.client.stream(
+            model=self.MODEL_NAME,
+            messages=self._build_report_messages(calendar_dump, onboarding_test_data),
+        ):
+            yield token
+
+    async def stream_responce_one_time(self, user_prompt) -> AsyncIterator[str]:
+        rejection = self._rejection_answer(await self._classify(user_prompt))
+        if rejection:
+            yield rejection
+            return
+
+        async for token in self.client.stream(
+            model=self.MODEL_NAME,
+            messages=self._build_one_time_help_messages(user_prompt),
+        ):
+            yield token
+
+    async def stream_cookie(self) -> AsyncIterator[str]:
+        async for token in self.client.stream(
+            model=self.MODEL_NAME,
+            messages=self._build_cookie_messages(),
+        ):
+            yield token
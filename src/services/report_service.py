@@ -0,0 +1,170 @@
+import asyncio
+import contextlib
+from datetime import date, timedelta
+from typing import Any
+from uuid import UUID, uuid4
+
+from loguru import logger
+
+from src.common.errors import ConflictError, NotFoundError
+from src.models.config import ReportConfig
+from src.repositories.report_job_repository import ReportJobRepository
+from src.services.auth_service import AuthService
+from src.services.calendar_service import CalendarService
+from src.services.llm_service import LLMService
+
+
+class ReportService:
+    """
+    Недельные отчёты: задачи хранятся в "ReportJob", генерацию выполняет
+    пул фоновых воркеров, HTTP-запрос только ставит задачу в очередь.
+    """
+
+    def __init__(
+        self,
+        report_job_repo: ReportJobRepository,
+        llm_service: LLMService,
+        calendar_service: CalendarService,
+        auth_service: AuthService,
+        config: ReportConfig,
+    ):
+        self.report_job_repo = report_job_repo
+        self.llm_service = llm_service
+        self.calendar_service = calendar_service
+        self.auth_service = auth_service
+        self.config = config
+        self._workers: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    async def collect_report_input(
+        self, user_id: str, start_date: date, end_date: date
+    ) -> tuple[list[list[str]], str]:
+        calendar_dump = await self.calendar_service.get_report_rows(
+            user_id=UUID(user_id), start_date=start_date, end_date=end_date
+        )
+        onboarding_test = await self.auth_service.get_onboarding_test(UUID(user_id))
+        onboarding_test_data = onboarding_test["result"] if onboarding_test else ""
+        return calendar_dump, onboarding_test_data
+
+    @staticmethod
+    def current_week() -> tuple[date, date]:
+        end_date = date.today()
+        return end_date - timedelta(days=6), end_date
+
+    async def submit(self, user_id: str) -> dict[str, Any]:
+        start_date, end_date = self.current_week()
+        job = await self.report_job_repo.create_job(
+            _id=uuid4(), user_id=UUID(user_id), start_date=start_date, end_date=end_date
+        )
+        return {"job_id": job["id"], "status": job["status"]}
+
+    async def get_job(self, job_id: UUID, user_id: str) -> dict[str, Any]:
+        job = await self.report_job_repo.get_job(job_id, UUID(user_id))
+        if not job:
+            raise NotFoundError(detail="Report job not found")
+
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "attempts": job["attempts"],
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+        }
+
+    async def get_result(self, job_id: UUID, user_id: str) -> dict[str, Any]:
+        job = await self.report_job_repo.get_job(job_id, UUID(user_id))
+        if not job:
+            raise NotFoundError(detail="Report job not found")
+        if job["status"] != "done":
+            raise ConflictError(detail=f"Report is not ready: {job['status']}")
+
+        return {"job_id": job["id"], "report": job["result"]}
+
+    async def start(self) -> None:
+        self._stopping.clear()
+        self._workers = [
+            asyncio.create_task(self._worker(number))
+            for number in range(self.config.REPORT_WORKERS)
+        ]
+        logger.info(f"Started {len(self._workers)} report workers")
+
+    async def stop(self) -> None:
+        # Незавершённые задачи останутся "running" и будут подобраны после истечения аренды
+        self._stopping.set()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _worker(self, number: int) -> None:
+        # Любая ошибка итерации только логируется: воркер не должен завершаться
+        while not self._stopping.is_set():
+            try:
+                job = await self.report_job_repo.claim_job(self.config.REPORT_JOB_LEASE)
+                if job is not None:
+                    await self._run_job(job)
+                    continue
+            except Exception:
+                logger.exception(f"Report worker {number} failed")
+
+            await self._pause()
+
+    async def _pause(self) -> None:
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                self._stopping.wait(), self.config.REPORT_POLL_INTERVAL
+            )
+
+    async def _run_job(self, job) -> None:
+        if job["attempts"] > self.config.REPORT_MAX_ATTEMPTS:
+            await self._fail_job(job, job["error"] or "Attempts exhausted")
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"], job["attempts"]))
+        try:
+            calendar_dump, onboarding_test_data = await self.collect_report_input(
+                str(job["user_id"]), job["start_date"], job["end_date"]
+            )
+            report = await self.llm_service.generate_report_llm(
+                calendar_dump, onboarding_test_data
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Report job {job['id']} failed: {e}")
+            await self._fail_job(job, str(e))
+        else:
+            if not await self.report_job_repo.complete_job(
+                job["id"], job["attempts"], report
+            ):
+                self._lease_lost(job)
+        finally:
+            heartbeat.cancel()
+
+    async def _fail_job(self, job, error: str) -> None:
+        if not await self.report_job_repo.fail_job(
+            job["id"], job["attempts"], error, self.config.REPORT_MAX_ATTEMPTS
+        ):
+            self._lease_lost(job)
+
+    @staticmethod
+    def _lease_lost(job) -> None:
+        logger.warning(
+            f"Report job {job['id']} attempt {job['attempts']} lost its lease, "
+            "result discarded"
+        )
+
+    async def _heartbeat(self, job_id: UUID, attempt: int) -> None:
+        while True:
+            await asyncio.sleep(self.config.REPORT_JOB_LEASE / 3)
+            try:
+                if not await self.report_job_repo.extend_lease(
+                    job_id, attempt, self.config.REPORT_JOB_LEASE
+                ):
+                    logger.warning(f"Report job {job_id} lost its lease")
+                    return
+            except Exception:
+                # Следующая попытка через треть аренды, пока аренда не истекла
+                logger.exception(f"Failed to extend lease of report job {job_id}")